@@ -6,24 +6,45 @@
 # converted to python3 by strayge:
 # https://github.com/strayge/pylnk
 import argparse
+import csv
+import json
+import mmap
 import ntpath
 import os
 import re
+import shutil
+import sys
+import tarfile
 import time
-from datetime import datetime
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from copy import copy
+from datetime import datetime, timezone
+from functools import partial
 from io import BytesIO, IOBase
+from itertools import islice
 from pprint import pformat
-from struct import pack, unpack
-from typing import Dict, Optional, Tuple, Union
+from struct import Struct, pack, unpack
+from struct import error as StructError
+from typing import Dict, NamedTuple, Optional, Tuple, Union
 
 DEFAULT_CHARSET = 'cp1251'
+# limits for malformed files: bytes of zero terminated string, size of data block and of whole file
+MAX_STRING_SIZE = 0x10000
+MAX_BLOCK_SIZE = 0x100000
+MAX_LNK_SIZE = MAX_BLOCK_SIZE * 16
 
 # ---- constants
 
 _SIGNATURE = b'L\x00\x00\x00'
 _GUID = b'\x01\x14\x02\x00\x00\x00\x00\x00\xc0\x00\x00\x00\x00\x00\x00F'
+# signature, guid, link flags, file flags, 3 FILETIMEs, file size, icon index, show command, hotkey, reserved
+_HEADER = Struct('<4s16s2I3Q3IH10x')
+HEADER_SIZE = _HEADER.size
 _LINK_INFO_HEADER_DEFAULT = 0x1C
 _LINK_INFO_HEADER_OPTIONAL = 0x24
+_LINK_INFO_HEADER = Struct('<7I')
 
 _LINK_FLAGS = (
     'HasLinkTargetIDList',
@@ -66,6 +87,17 @@ _FILE_ATTRIBUTES_FLAGS = (
 
 _MODIFIER_KEYS = ('SHIFT', 'CONTROL', 'ALT')
 
+# STRING_DATA fields in file order with the link flags marking their presence
+_STRING_DATA = (
+    ('description', 'HasName'),
+    ('relative_path', 'HasRelativePath'),
+    ('work_dir', 'HasWorkingDir'),
+    ('arguments', 'HasArguments'),
+    ('icon', 'HasIconLocation'),
+)
+_STRING_NAMES = tuple(name for name, _ in _STRING_DATA)
+_IS_UNICODE = 1 << _LINK_FLAGS.index('IsUnicode')
+
 WINDOW_NORMAL = "Normal"
 WINDOW_MAXIMIZED = "Maximized"
 WINDOW_MINIMIZED = "Minimized"
@@ -166,21 +198,34 @@ def read_double(buf):
     return unpack('<Q', buf.read(8))[0]
 
 
-def read_cunicode(buf):
-    s = b""
-    b = buf.read(2)
-    while b != b'\x00\x00':
+def _read_terminated(buf, width):
+    if isinstance(buf, BytesIO):
+        # search terminator in place
+        start = buf.tell()
+        with buf.getbuffer() as view:
+            stop = find_terminator(view, start, start + MAX_STRING_SIZE + width, width)
+            if stop < 0:
+                raise FormatException("Unterminated string at offset %d" % start)
+            s = view[start:stop].tobytes()
+        buf.seek(stop + width)
+        return s
+    terminator = b'\x00' * width
+    s = bytearray()
+    while True:
+        b = buf.read(width)
+        if b == terminator:
+            return bytes(s)
+        if len(b) < width or len(s) >= MAX_STRING_SIZE:
+            raise FormatException("Unterminated string")
         s += b
-        b = buf.read(2)
-    return s.decode('utf-16-le')
+
+
+def read_cunicode(buf):
+    return _read_terminated(buf, 2).decode('utf-16-le')
 
 
 def read_cstring(buf, padding=False):
-    s = b""
-    b = buf.read(1)
-    while b != b'\x00':
-        s += b
-        b = buf.read(1)
+    s = _read_terminated(buf, 1)
     if padding and not len(s) % 2:
         buf.read(1)  # make length + terminator even
     # TODO: encoding is not clear, unicode-escape has been necessary sometimes
@@ -206,6 +251,10 @@ def get_bits(value, start, count, length=16):
 def read_dos_datetime(buf):
     date = read_short(buf)
     time = read_short(buf)
+    return _dos_datetime(date, time)
+
+
+def _dos_datetime(date, time):
     year = get_bits(date, 0, 7) + 1980
     month = get_bits(date, 7, 4)
     day = get_bits(date, 11, 5)
@@ -218,6 +267,108 @@ def read_dos_datetime(buf):
     return datetime(year, month, day, hour, minute, second)
 
 
+# ---- read binary data at offsets of a buffer (bytes, bytearray, mmap or memoryview)
+
+_SHORT = Struct('<H')
+_INT = Struct('<I')
+_DOUBLE = Struct('<Q')
+_DOS_DATETIME = Struct('<HH')
+
+_NUL = re.compile(b'\x00')
+_WIDE_NUL = re.compile(b'(?:..)*?\x00\x00', re.DOTALL)
+
+
+def as_view(buf):
+    # flat byte view over the buffer, slicing it later doesn't copy data
+    view = memoryview(buf)
+    if view.format != 'B' or view.ndim != 1:
+        view = view.cast('B')
+    return view
+
+
+def _as_bytes(buf):
+    # detach stored values from the (possibly memory mapped) source buffer
+    return bytes(buf)
+
+
+def unpack_byte(buf, offset):
+    return buf[offset]
+
+
+def unpack_from(struct, buf, offset):
+    try:
+        return struct.unpack_from(buf, offset)
+    except StructError:
+        raise FormatException("Unexpected end of data at offset %d" % offset)
+
+
+def unpack_short(buf, offset):
+    return unpack_from(_SHORT, buf, offset)[0]
+
+
+def unpack_int(buf, offset):
+    return unpack_from(_INT, buf, offset)[0]
+
+
+def unpack_double(buf, offset):
+    return unpack_from(_DOUBLE, buf, offset)[0]
+
+
+def check_bounds(buf, offset, size, limit=None):
+    # raises for (sub)structure size going out of the data or the limit
+    if limit is not None and size > limit:
+        raise FormatException("Size %d at offset %d exceeds the limit %d" % (size, offset, limit))
+    if offset + size > len(buf):
+        raise FormatException("Size %d at offset %d exceeds the data" % (size, offset))
+
+
+def find_terminator(buf, start, end=None, width=1):
+    # terminator is searched at most MAX_STRING_SIZE bytes after start
+    if end is None:
+        end = len(buf)
+    end = min(end, start + MAX_STRING_SIZE + width)
+    if width == 1:
+        match = _NUL.search(buf, start, end)
+        return match.start() if match else -1
+    # utf-16 terminator must be aligned to the start of the string
+    match = _WIDE_NUL.match(buf, start, end)
+    return match.end() - 2 if match else -1
+
+
+def unpack_cunicode(buf, offset, end=None):
+    stop = find_terminator(buf, offset, end, width=2)
+    if stop < 0:
+        raise FormatException("Unterminated unicode string at offset %d" % offset)
+    return str(buf[offset:stop], 'utf-16-le'), stop + 2
+
+
+def unpack_cstring(buf, offset, end=None, padding=False):
+    stop = find_terminator(buf, offset, end)
+    if stop < 0:
+        raise FormatException("Unterminated string at offset %d" % offset)
+    next_offset = stop + 1
+    if padding and not (stop - offset) % 2:
+        next_offset += 1  # make length + terminator even
+    return str(buf[offset:stop], DEFAULT_CHARSET), next_offset
+
+
+def unpack_sized_string(buf, offset, string=True):
+    size = unpack_short(buf, offset)
+    offset += 2
+    if string:
+        size *= 2
+    check_bounds(buf, offset, size)
+    end = offset + size
+    if string:
+        return str(buf[offset:end], 'utf-16-le'), end
+    else:
+        return _as_bytes(buf[offset:end]), end
+
+
+def unpack_dos_datetime(buf, offset):
+    return _dos_datetime(*unpack_from(_DOS_DATETIME, buf, offset))
+
+
 def write_byte(val, buf):
     buf.write(pack('<B', val))
 
@@ -248,12 +399,15 @@ def write_cunicode(val, buf):
 
 
 def write_sized_string(val, buf, string=True):
-    size = len(val)
-    write_short(size, buf)
+    buf.write(pack_sized_string(val, string))
+
+
+def pack_sized_string(val, string=True):
     if string:
-        buf.write(val.encode('utf-16-le'))
-    else:
-        buf.write(val.encode())
+        data = val.encode('utf-16-le')
+        return pack('<H', len(data) // 2) + data
+    data = val if isinstance(val, bytes) else val.encode()
+    return pack('<H', len(data)) + data
 
 
 def put_bits(bits, target, start, count, length=16):
@@ -287,7 +441,11 @@ def convert_time_to_unix(windows_time):
 
 def convert_time_to_windows(unix_time):
     if isinstance(unix_time, datetime):
-        unix_time = time.mktime(unix_time.timetuple())
+        if unix_time.tzinfo is not None:
+            # aware time doesn't depend on local timezone
+            unix_time = unix_time.timestamp()
+        else:
+            unix_time = time.mktime(unix_time.timetuple())
     return int((unix_time + 11644473600) * 10000000)
 
 
@@ -331,10 +489,34 @@ def bytes_from_guid(guid):
     return bytes([int(x, 16) for x in ordered_nums])
 
 
+class LnkHeader(NamedTuple):
+    """Raw values of the fixed ShellLinkHeader."""
+    link_flags: int
+    file_flags: int
+    creation_time: int  # FILETIME
+    access_time: int  # FILETIME
+    modification_time: int  # FILETIME
+    file_size: int
+    icon_index: int
+    show_command: int
+    hot_key: int  # low byte is key code, high byte is modifiers
+
+
+def unpack_header(buf, offset=0):
+    if len(buf) - offset < HEADER_SIZE:
+        raise FormatException("This is not a .lnk file.")
+    values = _HEADER.unpack_from(buf, offset)
+    if values[0] != _SIGNATURE:
+        raise FormatException("This is not a .lnk file.")
+    if values[1] != _GUID:
+        raise FormatException("Cannot read this kind of .lnk file.")
+    return LnkHeader._make(values[2:])
+
+
 def assert_lnk_signature(f):
     f.seek(0)
-    sig = f.read(4)
-    guid = f.read(16)
+    data = f.read(20)
+    sig, guid = data[:4], data[4:]
     if sig != _SIGNATURE:
         raise FormatException("This is not a .lnk file.")
     if guid != _GUID:
@@ -402,7 +584,8 @@ class Flags(object):
         self._flags[key] = value
     
     def __getattr__(self, key):
-        if key in self._flags:
+        # _flags is not set yet while unpickling
+        if '_flags' in self.__dict__ and key in self._flags:
             return object.__getattribute__(self, '_flags')[key]
         return object.__getattribute__(self, key)
     
@@ -484,7 +667,7 @@ class DriveEntry(object):
     def __init__(self, drive: str):
         if len(drive) == 23:
             # binary data from parsed lnk
-            self.drive = drive[1:3]
+            self.drive = _as_bytes(drive[1:3])
         else:
             # text representation
             m = _DRIVE_PATTERN.match(drive.strip())
@@ -508,6 +691,40 @@ class DriveEntry(object):
         return "<DriveEntry: %s>" % self.drive
 
 
+# DOS date of path segments can't be earlier, used for unknown times
+UNKNOWN_TIME = datetime(1980, 1, 1, tzinfo=timezone.utc)
+
+
+def fixed_clock(value=UNKNOWN_TIME):
+    """
+    Clock for reproducible lnk files, always returns the same time.
+    Timezone aware value gives the same bytes at any local timezone.
+    """
+    def clock():
+        return value
+    return clock
+
+
+def _make_clock(clock=None, deterministic=False):
+    # callable returning the current time for all default timestamps
+    if clock is not None:
+        return clock
+    if deterministic:
+        return fixed_clock()
+    return datetime.now
+
+
+class PathMetadata(NamedTuple):
+    """
+    Metadata of file or folder used instead of filesystem calls at creating lnk files.
+    """
+    type: str = TYPE_FILE  # TYPE_FILE or TYPE_FOLDER
+    size: int = 0
+    created: datetime = UNKNOWN_TIME
+    modified: datetime = UNKNOWN_TIME
+    accessed: datetime = UNKNOWN_TIME
+
+
 class PathSegmentEntry(object):
     
     def __init__(self, bytes=None):
@@ -521,12 +738,12 @@ class PathSegmentEntry(object):
         if bytes is None:
             return
 
-        buf = BytesIO(bytes)
-        self.type = _ENTRY_TYPES.get(read_short(buf), 'UNKNOWN')
+        buf = as_view(bytes)
+        self.type = _ENTRY_TYPES.get(unpack_short(buf, 0), 'UNKNOWN')
         short_name_is_unicode = self.type.endswith('(UNICODE)')
 
         if self.type == 'ROOT_KNOWN_FOLDER':
-            self.full_name = '::' + guid_from_bytes(buf.read(16))
+            self.full_name = '::' + guid_from_bytes(buf[2:18])
             # then followed Beef0026 structure:
             # short size
             # short version
@@ -537,57 +754,70 @@ class PathSegmentEntry(object):
             return
 
         if self.type == 'KNOWN_FOLDER':
-            _ = read_short(buf)  # extra block size
-            extra_signature = read_int(buf)
+            # short at 2: extra block size
+            extra_signature = unpack_int(buf, 4)
             if extra_signature == 0x23FEBBEE:
-                _ = read_short(buf)  # unknown
-                _ = read_short(buf)  # guid len
+                # short at 8: unknown
+                # short at 10: guid len
                 # that format recognized by explorer
-                self.full_name = '::' + guid_from_bytes(buf.read(16))
+                self.full_name = '::' + guid_from_bytes(buf[12:28])
             return
 
-        self.file_size = read_int(buf)
-        self.modified = read_dos_datetime(buf)
-        unknown = read_short(buf)  # FileAttributesL
+        self.file_size = unpack_int(buf, 2)
+        self.modified = unpack_dos_datetime(buf, 6)
+        # short at 10: FileAttributesL
         if short_name_is_unicode:
-            self.short_name = read_cunicode(buf)
+            self.short_name, pos = unpack_cunicode(buf, 12)
         else:
-            self.short_name = read_cstring(buf, padding=True)
-        extra_size = read_short(buf)
-        extra_version = read_short(buf)
-        extra_signature = read_int(buf)
+            self.short_name, pos = unpack_cstring(buf, 12, padding=True)
+        # short at pos: extra_size
+        extra_version = unpack_short(buf, pos + 2)
+        extra_signature = unpack_int(buf, pos + 4)
+        pos += 8
         if extra_signature == 0xBEEF0004:
             # indicator_1 = read_short(buf)  # see below
             # only_83 = read_short(buf) < 0x03
             # unknown = read_short(buf)  # 0x04
             # self.is_unicode = read_short(buf) == 0xBeef
-            self.created = read_dos_datetime(buf)  # 4 bytes
-            self.accessed = read_dos_datetime(buf)  # 4 bytes
-            offset_unicode = read_short(buf)   # offset from start of extra_size
+            self.created = unpack_dos_datetime(buf, pos)  # 4 bytes
+            self.accessed = unpack_dos_datetime(buf, pos + 4)  # 4 bytes
+            # short at pos + 8: offset_unicode, offset from start of extra_size
             # only_83_2 = offset_unicode >= indicator_1 or offset_unicode < 0x14
+            pos += 10
             if extra_version >= 7:
-                offset_ansi = read_short(buf)
-                file_reference = read_double(buf)
-                unknown2 = read_double(buf)
+                # short offset_ansi, double file_reference, double unknown2
+                pos += 18
             long_string_size = 0
             if extra_version >= 3:
-                long_string_size = read_short(buf)
+                long_string_size = unpack_short(buf, pos)
+                pos += 2
             if extra_version >= 9:
-                unknown4 = read_int(buf)
+                pos += 4  # unknown4
             if extra_version >= 8:
-                unknown5 = read_int(buf)
+                pos += 4  # unknown5
             if extra_version >= 3:
-                self.full_name = read_cunicode(buf)
+                self.full_name, pos = unpack_cunicode(buf, pos)
                 if long_string_size > 0:
                     if extra_version >= 7:
-                        self.localized_name = read_cunicode(buf)
+                        self.localized_name, pos = unpack_cunicode(buf, pos)
                     else:
-                        self.localized_name = read_cstring(buf)
-                version_offset = read_short(buf)
+                        self.localized_name, pos = unpack_cstring(buf, pos)
+                # short at pos: version_offset
 
     @classmethod
-    def create_for_path(cls, path):
+    def create_for_path(cls, path, metadata: Optional[PathMetadata] = None, clock=datetime.now):
+        # filesystem is used only if metadata is not given, clock gives times of non-existed paths
         entry = cls()
+        entry.short_name = ntpath.split(path)[1]
+        entry.full_name = entry.short_name
+        if metadata is not None:
+            entry.type = metadata.type
+            entry.file_size = metadata.size
+            entry.created = metadata.created
+            entry.modified = metadata.modified
+            entry.accessed = metadata.accessed
+            entry.fill_times(clock)
+            return entry
         entry.type = os.path.isdir(path) and TYPE_FOLDER or TYPE_FILE
         try:
             st = os.stat(path)
@@ -596,15 +826,22 @@ class PathSegmentEntry(object):
             entry.created = datetime.fromtimestamp(st.st_ctime)
             entry.accessed = datetime.fromtimestamp(st.st_atime)
         except FileNotFoundError:
-            now = datetime.now()
+            now = clock()
             entry.file_size = 0
             entry.modified = now
             entry.created = now
             entry.accessed = now
-        entry.short_name = ntpath.split(path)[1]
-        entry.full_name = entry.short_name
         return entry
 
+    def fill_times(self, clock):
+        # missing times are taken from clock (callable returning datetime)
+        if self.created is None:
+            self.created = clock()
+        if self.modified is None:
+            self.modified = clock()
+        if self.accessed is None:
+            self.accessed = clock()
+
     def _validate(self):
         if self.type is None:
             raise MissingInformationException("Type is missing, choose either TYPE_FOLDER or TYPE_FILE.")
@@ -613,12 +850,7 @@ class PathSegmentEntry(object):
                 self.file_size = 0
             else:
                 raise MissingInformationException("File size missing")
-        if self.created is None:
-            self.created = datetime.now()
-        if self.modified is None:
-            self.modified = datetime.now()
-        if self.accessed is None:
-            self.accessed = datetime.now()
+        self.fill_times(datetime.now)
         # if self.modified is None or self.accessed is None or self.created is None:
         #     raise MissingInformationException("Date information missing")
         if self.full_name is None:
@@ -722,7 +954,7 @@ class UwpSubBlock:
     }
 
     def __init__(self, bytes=None, type=None, value=None):
-        self._data = bytes or b''
+        self._data = _as_bytes(bytes) if bytes else b''
         self.type = type
         self.value = value
         self.name = None
@@ -730,17 +962,17 @@ class UwpSubBlock:
             self.name = self.block_names.get(self.type, 'UNKNOWN')
         if not bytes:
             return
-        buf = BytesIO(bytes)
-        self.type = read_byte(buf)
+        buf = as_view(bytes)
+        self.type = unpack_byte(buf, 0)
         self.name = self.block_names.get(self.type, 'UNKNOWN')
 
         self.value = self._data[1:]  # skip type
         if self.type in self.block_types['string']:
-            unknown = read_int(buf)
-            probably_type = read_int(buf)
+            # int at 1: unknown
+            probably_type = unpack_int(buf, 5)
             if probably_type == 0x1f:
-                string_len = read_int(buf)
-                self.value = read_cunicode(buf)
+                # int at 9: string_len
+                self.value, _ = unpack_cunicode(buf, 13)
 
     def __str__(self):
         string = f'UwpSubBlock {self.name} ({hex(self.type)}): {self.value}'
@@ -774,21 +1006,23 @@ class UwpMainBlock:
     magic = b'\x31\x53\x50\x53'
 
     def __init__(self, bytes=None, guid: Optional[str] = None, blocks=None):
-        self._data = bytes or b''
+        self._data = _as_bytes(bytes) if bytes else b''
         self._blocks = blocks or []
         self.guid: str = guid
         if not bytes:
             return
-        buf = BytesIO(bytes)
-        magic = buf.read(4)
-        self.guid = guid_from_bytes(buf.read(16))
+        buf = as_view(bytes)
+        # magic at 0
+        self.guid = guid_from_bytes(buf[4:20])
         # read sub blocks
+        pos = 20
         while True:
-            sub_block_size = read_int(buf)
+            sub_block_size = unpack_int(buf, pos)
             if not sub_block_size:  # last size is zero
                 break
-            sub_block_data = buf.read(sub_block_size - 4)  # includes block_size
+            sub_block_data = buf[pos + 4:pos + sub_block_size]  # includes block_size
             self._blocks.append(UwpSubBlock(sub_block_data))
+            pos += sub_block_size
 
     def __str__(self):
         string = f'<UwpMainBlock> {self.guid}:\n'
@@ -819,19 +1053,22 @@ class UwpSegmentEntry:
         self._data = bytes
         if bytes is None:
             return
-        buf = BytesIO(bytes)
-        unknown = read_short(buf)
-        size = read_short(buf)
-        magic = buf.read(4)  # b'APPS'
-        blocks_size = read_short(buf)
-        unknown2 = buf.read(10)
+        self._data = _as_bytes(bytes)
+        buf = as_view(bytes)
+        # short at 0: unknown
+        # short at 2: size
+        # 4 bytes at 4: magic b'APPS'
+        # short at 8: blocks_size
+        # 10 bytes at 10: unknown2
         # read main blocks
+        pos = 20
         while True:
-            block_size = read_int(buf)
+            block_size = unpack_int(buf, pos)
             if not block_size:  # last size is zero
                 break
-            block_data = buf.read(block_size - 4)  # includes block_size
+            block_data = buf[pos + 4:pos + block_size]  # includes block_size
             self._blocks.append(UwpMainBlock(block_data))
+            pos += block_size
 
     def __str__(self):
         string = '<UwpSegmentEntry>:\n'
@@ -895,12 +1132,15 @@ class LinkTargetIDList(object):
     def __init__(self, bytes=None):
         self.items = []
         if bytes is not None:
-            buf = BytesIO(bytes)
+            buf = as_view(bytes)
             raw = []
-            entry_len = read_short(buf)
+            pos = 0
+            entry_len = unpack_short(buf, pos)
             while entry_len > 0:
-                raw.append(buf.read(entry_len - 2))  # the length includes the size
-                entry_len = read_short(buf)
+                check_bounds(buf, pos, entry_len)
+                raw.append(buf[pos + 2:pos + entry_len])  # the length includes the size
+                pos += entry_len
+                entry_len = unpack_short(buf, pos)
             self._interpret(raw)
     
     def _interpret(self, raw):
@@ -979,52 +1219,65 @@ class LinkTargetIDList(object):
 class LinkInfo(object):
 
     def __init__(self, lnk=None):
-        if lnk is not None:
-            self.start = lnk.tell()
-            self.size = read_int(lnk)
-            self.header_size = read_int(lnk)
-            link_info_flags = read_int(lnk)
-            self.local = link_info_flags & 1
-            self.remote = link_info_flags & 2
-            self.offs_local_volume_table = read_int(lnk)
-            self.offs_local_base_path = read_int(lnk)
-            self.offs_network_volume_table = read_int(lnk)
-            self.offs_base_name = read_int(lnk)
-            if self.header_size >= _LINK_INFO_HEADER_OPTIONAL:
-                pass # TODO: read the unicode stuff
-            self._parse_path_elements(lnk)
+        self.size = None
+        self.header_size = _LINK_INFO_HEADER_DEFAULT
+        self.local = 0
+        self.remote = 0
+        self.offs_local_volume_table = 0
+        self.offs_local_base_path = 0
+        self.offs_network_volume_table = 0
+        self.offs_base_name = 0
+        self.drive_type = None
+        self.drive_serial = None
+        self.volume_label = None
+        self.local_base_path = None
+        self.network_share_name = None
+        self.base_name = None
+        self._path = None
+        if lnk is None:
+            return
+        if hasattr(lnk, 'read'):
+            # stream positioned at the LinkInfo, read the whole structure at once
+            start = lnk.tell() if getattr(lnk, 'seekable', lambda: True)() else 0
+            size = read_int(lnk)
+            if size > MAX_BLOCK_SIZE:
+                raise FormatException("LinkInfo size %d exceeds the limit %d" % (size, MAX_BLOCK_SIZE))
+            self._parse(pack('<I', size) + lnk.read(size - 4), 0)
+            self.start = start
         else:
-            self.size = None
-            self.header_size = _LINK_INFO_HEADER_DEFAULT
-            self.local = 0
-            self.remote = 0
-            self.offs_local_volume_table = 0
-            self.offs_local_base_path = 0
-            self.offs_network_volume_table = 0
-            self.offs_base_name = 0
-            self.drive_type = None
-            self.drive_serial = None
-            self.volume_label = None
-            self.local_base_path = None
-            self.network_share_name = None
-            self.base_name = None
-            self._path = None
-
-    def _parse_path_elements(self, lnk):
+            self._parse(lnk, 0)
+
+    def _parse(self, buf, offset):
+        buf = as_view(buf)
+        self.start = offset
+        (
+            self.size,
+            self.header_size,
+            link_info_flags,
+            self.offs_local_volume_table,
+            self.offs_local_base_path,
+            self.offs_network_volume_table,
+            self.offs_base_name,
+        ) = unpack_from(_LINK_INFO_HEADER, buf, offset)
+        check_bounds(buf, offset, self.size, MAX_BLOCK_SIZE)
+        self.local = link_info_flags & 1
+        self.remote = link_info_flags & 2
+        if self.header_size >= _LINK_INFO_HEADER_OPTIONAL:
+            pass # TODO: read the unicode stuff
+        self._parse_path_elements(buf)
+
+    def _parse_path_elements(self, buf):
         if self.remote:
             # 20 is the offset of the network share name
-            lnk.seek(self.start + self.offs_network_volume_table + 20)
-            self.network_share_name = read_cstring(lnk)
-            lnk.seek(self.start + self.offs_base_name)
-            self.base_name = read_cstring(lnk)
+            self.network_share_name, _ = unpack_cstring(buf, self.start + self.offs_network_volume_table + 20)
+            self.base_name, _ = unpack_cstring(buf, self.start + self.offs_base_name)
         if self.local:
-            lnk.seek(self.start + self.offs_local_volume_table + 4)
-            self.drive_type = _DRIVE_TYPES.get(read_int(lnk))
-            self.drive_serial = read_int(lnk)
-            lnk.read(4)  # volume name offset (10h)
-            self.volume_label = read_cstring(lnk)
-            lnk.seek(self.start + self.offs_local_base_path)
-            self.local_base_path = read_cstring(lnk)
+            volume_table = self.start + self.offs_local_volume_table
+            self.drive_type = _DRIVE_TYPES.get(unpack_int(buf, volume_table + 4))
+            self.drive_serial = unpack_int(buf, volume_table + 8)
+            # int at volume_table + 12: volume name offset (10h)
+            self.volume_label, _ = unpack_cstring(buf, volume_table + 16)
+            self.local_base_path, _ = unpack_cstring(buf, self.start + self.offs_local_base_path)
             # TODO: unicode
         self.make_path()
 
@@ -1054,11 +1307,19 @@ class LinkInfo(object):
             write_cstring(self.local_base_path, lnk, padding=False)
             write_byte(0, lnk)
     
+    @property
+    def bytes(self):
+        out = BytesIO()
+        self.write(out)
+        return out.getvalue()
+
     def _calculate_sizes_and_offsets(self):
-        self.size_base_name = 1  # len(self.base_name) + 1  # zero terminated strings
+        self.size_base_name = 1  # zero terminated strings
+        if self.remote:
+            self.size_base_name = len(self.base_name) + 1
         self.size = 28 + self.size_base_name
         if self.remote:
-            self.size_network_volume_table = 20 + len(self.network_share_name) + len(self.base_name) + 1
+            self.size_network_volume_table = 20 + len(self.network_share_name) + 1
             self.size += self.size_network_volume_table
             self.offs_local_volume_table = 0
             self.offs_local_base_path = 0
@@ -1137,7 +1398,7 @@ class ExtraData_Unparsed(object):
         #     self._size = len(data)
         if bytes:
             # self._size = len(bytes)
-            self.data = bytes
+            self.data = _as_bytes(bytes)
             # self.read(bytes)
 
     # def read(self, bytes):
@@ -1174,11 +1435,11 @@ class ExtraData_IconEnvironmentDataBlock(object):
             self.read(bytes)
 
     def read(self, bytes):
-        buf = BytesIO(bytes)
+        buf = as_view(bytes)
         # self._size = read_int(buf)
         # self._signature = read_int(buf)
-        self.target_ansi = buf.read(260).decode('ansi')
-        self.target_unicode = buf.read(520).decode('utf-16-le')
+        self.target_ansi = str(buf[:260], 'ansi')
+        self.target_unicode = str(buf[260:780], 'utf-16-le')
 
     def bytes(self):
         target_ansi = padding(self.target_ansi.encode(), 260)
@@ -1215,9 +1476,9 @@ class TypedPropertyValue(object):
         self.type = type
         self.value = value
         if bytes:
-            self.type = read_short(BytesIO(bytes))
-            padding = bytes[2:4]
-            self.value = bytes[4:]
+            self.type = unpack_short(bytes, 0)
+            # 2 bytes at 2: padding
+            self.value = _as_bytes(bytes[4:])
 
     def set_string(self, value):
         self.type = 0x1f
@@ -1277,36 +1538,48 @@ class PropertyStore:
         if bytes:
             self.read(bytes)
 
-    def read(self, bytes_io):
-        buf = bytes_io
-        size = read_int(buf)
-        assert size < len(buf.getvalue())
+    def read(self, buf, offset=0):
+        if isinstance(buf, BytesIO):
+            # continue from the current stream position
+            end = self.read(buf.getvalue(), buf.tell())
+            buf.seek(end)
+            return end
+        buf = as_view(buf)
+        size = unpack_int(buf, offset)
+        if size >= len(buf):
+            raise FormatException("PropertyStore size %d at offset %d exceeds the data" % (size, offset))
         if size == 0x00000000:
             self._is_end = True
-            return
-        version = read_int(buf)
-        assert version == 0x53505331
-        self.format_id = buf.read(16)
+            return offset + 4
+        version = unpack_int(buf, offset + 4)
+        if version != 0x53505331:
+            raise FormatException("Unknown PropertyStore version %s" % hex(version))
+        self.format_id = _as_bytes(buf[offset + 8:offset + 24])
         if self.format_id == b'\xD5\xCD\xD5\x05\x2E\x9C\x10\x1B\x93\x97\x08\x00\x2B\x2C\xF9\xAE':
             self.is_strings = True
         else:
             self.is_strings = False
+        pos = offset + 24
         while True:
-            # assert lnk.tell() < (start + size)
-            value_size = read_int(buf)
+            # assert pos < (offset + size)
+            value_size = unpack_int(buf, pos)
             if value_size == 0x00000000:
+                pos += 4
                 break
+            # byte at pos + 8: reserved
             if self.is_strings:
-                name_size = read_int(buf)
-                reserved = read_byte(buf)
-                name = buf.read(name_size).decode('utf-16-le')
-                value = TypedPropertyValue(buf.read(value_size-9))
+                name_size = unpack_int(buf, pos + 4)
+                name = str(buf[pos + 9:pos + 9 + name_size], 'utf-16-le')
+                pos += 9 + name_size
+                value = TypedPropertyValue(buf[pos:pos + value_size - 9])
                 self.properties.append((name, value))
             else:
-                value_id = read_int(buf)
-                reserved = read_byte(buf)
-                value = TypedPropertyValue(buf.read(value_size-9))
+                value_id = unpack_int(buf, pos + 4)
+                pos += 9
+                value = TypedPropertyValue(buf[pos:pos + value_size - 9])
                 self.properties.append((value_id, value))
+            pos += value_size - 9
+        return pos
 
     @property
     def bytes(self):
@@ -1360,20 +1633,20 @@ class ExtraData_PropertyStoreDataBlock(object):
             self.read(bytes)
 
     def read(self, bytes):
-        buf = BytesIO(bytes)
+        buf = as_view(bytes)
         # self._size = read_int(buf)
         # self._signature = read_int(buf)
         # [MS-PROPSTORE] section 2.2
+        pos = 0
         while True:
-            prop_store = PropertyStore(buf)
+            prop_store = PropertyStore()
+            pos = prop_store.read(buf, pos)
             if prop_store._is_end:
                 break
             self.stores.append(prop_store)
 
     def bytes(self):
-        stores = b''
-        for prop_store in self.stores:
-            stores += prop_store.bytes
+        stores = b''.join([prop_store.bytes for prop_store in self.stores])
         size = len(stores) + 8 + 4
 
         assert self._signature == 0xA0000009
@@ -1402,9 +1675,9 @@ class ExtraData_EnvironmentVariableDataBlock(object):
             self.read(bytes)
 
     def read(self, bytes):
-        buf = BytesIO(bytes)
-        self.target_ansi = buf.read(260).decode()
-        self.target_unicode = buf.read(520).decode('utf-16-le')
+        buf = as_view(bytes)
+        self.target_ansi = str(buf[:260], 'utf-8')
+        self.target_unicode = str(buf[260:780], 'utf-16-le')
 
     def bytes(self):
         target_ansi = padding(self.target_ansi.encode(), 260)
@@ -1441,30 +1714,44 @@ class ExtraData(object):
             self.blocks = blocks
         if lnk is None:
             return
+        if not hasattr(lnk, 'read'):
+            self._parse(lnk, 0)
+            return
         while True:
             size = read_int(lnk)
             if size < 4:  # TerminalBlock
                 break
+            if size > MAX_BLOCK_SIZE:
+                raise FormatException("ExtraData block size %d exceeds the limit %d" % (size, MAX_BLOCK_SIZE))
             signature = read_int(lnk)
-            bytes = lnk.read(size-8)
-            # lnk.seek(-8, 1)
-            # gracefully handle unknown ExtraData block signature
-            block_type = EXTRA_DATA_TYPES.get(signature)
-            if block_type in EXTRA_DATA_TYPES_CLASSES:
-                block_class = EXTRA_DATA_TYPES_CLASSES[block_type]
-                block = block_class(bytes=bytes)
-            else:
-                block_class = ExtraData_Unparsed
-                block = block_class(bytes=bytes, signature=signature)
-            self.blocks.append(block)
+            self.blocks.append(self._make_block(signature, lnk.read(size-8)))
+
+    def _parse(self, buf, offset):
+        buf = as_view(buf)
+        pos = offset
+        while True:
+            size = unpack_int(buf, pos)
+            if size < 4:  # TerminalBlock
+                return pos + 4
+            check_bounds(buf, pos, size, MAX_BLOCK_SIZE)
+            signature = unpack_int(buf, pos + 4)
+            self.blocks.append(self._make_block(signature, buf[pos + 8:pos + size]))
+            pos += size
+
+    @staticmethod
+    def _make_block(signature, bytes):
+        # gracefully handle unknown ExtraData block signature
+        block_type = EXTRA_DATA_TYPES.get(signature)
+        if block_type in EXTRA_DATA_TYPES_CLASSES:
+            block_class = EXTRA_DATA_TYPES_CLASSES[block_type]
+            return block_class(bytes=bytes)
+        return ExtraData_Unparsed(bytes=bytes, signature=signature)
 
     @property
     def bytes(self):
-        result = b''
-        for block in self.blocks:
-            result += block.bytes()
-        result += b'\x00\x00\x00\x00'  # TerminalBlock
-        return result
+        blocks = [block.bytes() for block in self.blocks]
+        blocks.append(b'\x00\x00\x00\x00')  # TerminalBlock
+        return b''.join(blocks)
 
     def __str__(self):
         s = ''
@@ -1475,7 +1762,14 @@ class ExtraData(object):
 
 class Lnk(object):
     
-    def __init__(self, f=None):
+    def __init__(self, f=None, lazy=False, clock=None, deterministic=False):
+        # clock (callable returning datetime) gives default timestamps of new lnk,
+        # deterministic=True uses the fixed time of fixed_clock()
+        # sections recorded but not yet decoded at lazy parsing: name -> offset
+        self._lazy_sections: Dict[str, int] = {}
+        self._lazy_buffer = None
+        # original bytes of sections unmodified since parsing, written back as is
+        self._raw_sections: Dict[str, memoryview] = {}
         self.file = None
         if type(f) == str or type(f) == str:
             self.file = f
@@ -1485,15 +1779,19 @@ class Lnk(object):
                 self.file += ".lnk"
                 f = open(self.file, 'rb')
         # defaults
+        clock = _make_clock(clock, deterministic)
         self.link_flags = Flags(_LINK_FLAGS)
         self.file_flags = Flags(_FILE_ATTRIBUTES_FLAGS)
-        self.creation_time = datetime.now()
-        self.access_time = datetime.now()
-        self.modification_time = datetime.now()
+        self.creation_time = clock()
+        self.access_time = clock()
+        self.modification_time = clock()
         self.file_size = 0
         self.icon_index = 0
         self._show_command = WINDOW_NORMAL
         self.hot_key = None
+        # raw header as parsed and the times decoded from it
+        self._header = None
+        self._header_times = None
         self._link_info = LinkInfo()
         self.description = None
         self.relative_path = None
@@ -1502,19 +1800,43 @@ class Lnk(object):
         self.icon = None
         self.extra_data = None
         if f is not None:
-            assert_lnk_signature(f)
-            self._parse_lnk_file(f)
+            self._parse_lnk_file(f, lazy)
         if self.file:
             f.close()
+
+    @classmethod
+    def from_buffer(cls, buf, offset=0, lazy=False):
+        """
+        Parses lnk from bytes, bytearray, mmap or memoryview.
+        Fields are decoded in place at their offsets, without copying the sections.
+        With lazy=True only the header is decoded, other sections are decoded
+        at first access, so the buffer must stay open until then.
+        """
+        lnk = cls()
+        lnk._parse_lnk_buffer(as_view(buf), offset, lazy)
+        return lnk
+
+    def __getstate__(self):
+        # the source buffer of lazy parsing can't be pickled, decode everything left
+        for name in list(self._lazy_sections):
+            self._load_section(name)
+        state = self.__dict__.copy()
+        state['_raw_sections'] = {}
+        return state
     
-    def _read_hot_key(self, lnk):
-        low = read_byte(lnk)
-        high = read_byte(lnk)
+    def _read_hot_key(self, hot_key):
+        low = hot_key & 0xFF
+        high = hot_key >> 8
         key = _KEYS.get(low, '')
         modifier = high and str(ModifierKeys(high)) or ''
         return modifier + key
     
     def _write_hot_key(self, hot_key, lnk):
+        hot_key = self._hot_key_word(hot_key)
+        write_byte(hot_key & 0xFF, lnk)
+        write_byte(hot_key >> 8, lnk)
+
+    def _hot_key_word(self, hot_key):
         if hot_key is None or not hot_key:
             low = high = 0
         else:
@@ -1527,159 +1849,305 @@ class Lnk(object):
             for modifier in hot_key[:-1]:
                 modifiers[modifier.upper()] = True
             high = modifiers.bytes
-        write_byte(low, lnk)
-        write_byte(high, lnk)
-
-    def _parse_lnk_file(self, lnk):
+        return high << 8 | low
+
+    def _parse_lnk_file(self, lnk, lazy=False):
+        seekable = getattr(lnk, 'seekable', None)
+        if seekable is None or seekable():
+            lnk.seek(0)
+        # header is checked first and only declared sizes are read, so other big files are not loaded;
+        # non-seekable streams (pipes, sockets) are read from the current position
+        data = read_lnk_stream(lnk)
+        self._parse_lnk_buffer(as_view(data), 0, lazy)
+
+    def _parse_lnk_buffer(self, buf, offset=0, lazy=False):
         # SHELL_LINK_HEADER [LINKTARGET_IDLIST] [LINKINFO] [STRING_DATA] *EXTRA_DATA
 
         # SHELL_LINK_HEADER
-        lnk.seek(20)  # after signature and guid
-        self.link_flags.set_flags(read_int(lnk))
-        self.file_flags.set_flags(read_int(lnk))
-        self.creation_time = convert_time_to_unix(read_double(lnk))
-        self.access_time = convert_time_to_unix(read_double(lnk))
-        self.modification_time = convert_time_to_unix(read_double(lnk))
-        self.file_size = read_int(lnk)
-        self.icon_index = read_int(lnk)
-        show_command = read_int(lnk)
+        header = unpack_header(buf, offset)
+        self.link_flags.set_flags(header.link_flags)
+        self.file_flags.set_flags(header.file_flags)
+        self.creation_time = convert_time_to_unix(header.creation_time)
+        self.access_time = convert_time_to_unix(header.access_time)
+        self.modification_time = convert_time_to_unix(header.modification_time)
+        self.file_size = header.file_size
+        self.icon_index = header.icon_index
+        show_command = header.show_command
         self._show_command = _SHOW_COMMANDS[show_command] if show_command in _SHOW_COMMANDS else _SHOW_COMMANDS[1]
-        self.hot_key = self._read_hot_key(lnk)
-        lnk.read(10)  # reserved (0)
+        self.hot_key = self._read_hot_key(header.hot_key)
+        self._header = header
+        self._header_times = (self.creation_time, self.access_time, self.modification_time)
+        pos = offset + HEADER_SIZE
+
+        for name in self._section_names():
+            if lazy:
+                self._lazy_sections[name] = pos
+                pos = self._skip_section(buf, name, pos)
+            else:
+                pos = self._decode_section(buf, name, pos)
+        if self._lazy_sections:
+            self._lazy_buffer = buf
+        return pos
 
-        # LINKTARGET_IDLIST (HasLinkTargetIDList)
+    def _section_names(self):
+        # [LINKTARGET_IDLIST] [LINKINFO] [STRING_DATA] *EXTRA_DATA
         if self.link_flags.HasLinkTargetIDList:
-            shell_item_id_list_size = read_short(lnk)
-            self.shell_item_id_list = LinkTargetIDList(lnk.read(shell_item_id_list_size))
-
-        # LINKINFO (HasLinkInfo)
+            yield 'shell_item_id_list'
         if self.link_flags.HasLinkInfo and not self.link_flags.ForceNoLinkInfo:
-            self._link_info = LinkInfo(lnk)
-            lnk.seek(self._link_info.start + self._link_info.size)
-
+            yield 'link_info'
         # STRING_DATA = [NAME_STRING] [RELATIVE_PATH] [WORKING_DIR] [COMMAND_LINE_ARGUMENTS] [ICON_LOCATION]
-        if self.link_flags.HasName:
-            self.description = read_sized_string(lnk, self.link_flags.IsUnicode)
-        if self.link_flags.HasRelativePath:
-            self.relative_path = read_sized_string(lnk, self.link_flags.IsUnicode)
-        if self.link_flags.HasWorkingDir:
-            self.work_dir = read_sized_string(lnk, self.link_flags.IsUnicode)
-        if self.link_flags.HasArguments:
-            self.arguments = read_sized_string(lnk, self.link_flags.IsUnicode)
-        if self.link_flags.HasIconLocation:
-            self.icon = read_sized_string(lnk, self.link_flags.IsUnicode)
-
-        # *EXTRA_DATA
-        self.extra_data = ExtraData(lnk)
-
-    def save(self, f: Optional[Union[str, IOBase]] = None, force_ext=False):
+        for name, flag in _STRING_DATA:
+            if self.link_flags[flag]:
+                yield name
+        yield 'extra_data'
+
+    def _decode_section(self, buf, name, offset):
+        end = self._decode(buf, name, offset)
+        if type(buf.obj) is bytes:
+            # source is immutable, so its bytes can be reused while the section is unmodified
+            self._raw_sections[name] = buf[offset:end]
+        return end
+
+    def _decode(self, buf, name, offset):
+        if name == 'shell_item_id_list':
+            size = unpack_short(buf, offset)
+            check_bounds(buf, offset + 2, size)
+            self._shell_item_id_list = LinkTargetIDList(buf[offset + 2:offset + 2 + size])
+            return offset + 2 + size
+        if name == 'link_info':
+            self._link_info = LinkInfo()
+            self._link_info._parse(buf, offset)
+            return offset + self._link_info.size
+        if name == 'extra_data':
+            self._extra_data = ExtraData()
+            return self._extra_data._parse(buf, offset)
+        value, offset = unpack_sized_string(buf, offset, self._parsed_unicode())
+        setattr(self, '_' + name, value)
+        return offset
+
+    def _parsed_unicode(self):
+        # strings are stored with IsUnicode of the parsed header, the flag may be changed later
+        return bool(self._header.link_flags & _IS_UNICODE)
+
+    def _skip_section(self, buf, name, offset):
+        if name == 'shell_item_id_list':
+            return offset + 2 + unpack_short(buf, offset)
+        if name == 'link_info':
+            return offset + unpack_int(buf, offset)
+        if name == 'extra_data':
+            size = unpack_int(buf, offset)
+            while size >= 4:  # until TerminalBlock
+                offset += size
+                size = unpack_int(buf, offset)
+            return offset + 4
+        char_size = 2 if self._parsed_unicode() else 1
+        return offset + 2 + unpack_short(buf, offset) * char_size
+
+    def _load_section(self, name):
+        offset = self._lazy_sections.pop(name, None)
+        if offset is None:
+            return
+        self._decode_section(self._lazy_buffer, name, offset)
+        if not self._lazy_sections:
+            self._lazy_buffer = None
+
+    def _section(self, name):
+        # section for reading only
+        self._load_section(name)
+        return getattr(self, '_' + name)
+
+    def _mutable_section(self, name):
+        # section object may be changed in place, so its original bytes can't be reused
+        section = self._section(name)
+        self._raw_sections.pop(name, None)
+        return section
+
+    def _raw_section(self, name):
+        # original bytes of the section if it wasn't changed, otherwise None
+        offset = self._lazy_sections.get(name)
+        if offset is not None:
+            buf = self._lazy_buffer
+            raw = buf[offset:self._skip_section(buf, name, offset)]
+        else:
+            raw = self._raw_sections.get(name)
+        if raw is not None and name in _STRING_NAMES:
+            # strings are encoded again if IsUnicode was changed
+            if self.link_flags.IsUnicode != self._parsed_unicode():
+                return None
+        return raw
+
+    def save(
+        self, f: Optional[Union[str, IOBase]] = None, force_ext=False, skip_if_identical=False,
+        atomic=False, batch=None,
+    ) -> bool:
+        """
+        Writes lnk to filename or binary stream.
+        With skip_if_identical=True existed file with the same content is not written.
+        With atomic=True file is replaced at once and synced (see write_atomic),
+        replacing and syncing are deferred until commit of SaveBatch if batch is given.
+        Returns False if writing was skipped.
+        """
         if f is None:
             f = self.file
         if f is None:
             raise ValueError("File (name) missing for saving the lnk")
-        is_file = hasattr(f, 'write')
-        if not is_file:
-            if not type(f) == str and not type(f) == str:
-                raise ValueError("Need a writeable object or a file name to save to, got %s" % f)
-            if force_ext:
-                if not f.lower().endswith('.lnk'):
-                    f += '.lnk'
-            f = open(f, 'wb')
-        self.write(f)
-        # only close the stream if it's our own
-        if not is_file:
-            f.close()
+        if hasattr(f, 'write'):
+            self.write(f)
+            return True
+        if not type(f) == str and not type(f) == str:
+            raise ValueError("Need a writeable object or a file name to save to, got %s" % f)
+        if force_ext:
+            if not f.lower().endswith('.lnk'):
+                f += '.lnk'
+        return _save_bytes(f, self.to_bytes(), skip_if_identical, atomic, batch)
     
     def write(self, lnk):
-        lnk.write(_SIGNATURE)
-        lnk.write(_GUID)
-        write_int(self.link_flags.bytes, lnk)
-        write_int(self.file_flags.bytes, lnk)
-        write_double(convert_time_to_windows(self.creation_time), lnk)
-        write_double(convert_time_to_windows(self.access_time), lnk)
-        write_double(convert_time_to_windows(self.modification_time), lnk)
-        write_int(self.file_size, lnk)
-        write_int(self.icon_index, lnk)
-        write_int(_SHOW_COMMAND_IDS[self._show_command], lnk)
-        self._write_hot_key(self.hot_key, lnk)
-        lnk.write(b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00')  # reserved
+        lnk.write(self.to_bytes())
+
+    def to_bytes(self):
+        # all sections are encoded first and joined into the output at once
+        # sections unmodified since parsing are copied as is
+        parts = [_HEADER.pack(_SIGNATURE, _GUID, *self.header)]
         if self.link_flags.HasLinkTargetIDList:
-            shell_item_id_list = self.shell_item_id_list.bytes
-            write_short(len(shell_item_id_list), lnk)
-            lnk.write(shell_item_id_list)
+            raw = self._raw_section('shell_item_id_list')
+            if raw is not None:
+                parts.append(raw)
+            else:
+                shell_item_id_list = self._section('shell_item_id_list').bytes
+                parts.append(_SHORT.pack(len(shell_item_id_list)))
+                parts.append(shell_item_id_list)
         if self.link_flags.HasLinkInfo:
-            self._link_info.write(lnk)
-        if self.link_flags.HasName:
-            write_sized_string(self.description, lnk, self.link_flags.IsUnicode)
-        if self.link_flags.HasRelativePath:
-            write_sized_string(self.relative_path, lnk, self.link_flags.IsUnicode)
-        if self.link_flags.HasWorkingDir:
-            write_sized_string(self.work_dir, lnk, self.link_flags.IsUnicode)
-        if self.link_flags.HasArguments:
-            write_sized_string(self.arguments, lnk, self.link_flags.IsUnicode)
-        if self.link_flags.HasIconLocation:
-            write_sized_string(self.icon, lnk, self.link_flags.IsUnicode)
-        if self.extra_data:
-            lnk.write(self.extra_data.bytes)
+            raw = self._raw_section('link_info')
+            parts.append(raw if raw is not None else self._section('link_info').bytes)
+        for name, flag in _STRING_DATA:
+            if self.link_flags[flag]:
+                raw = self._raw_section(name)
+                if raw is not None:
+                    parts.append(raw)
+                else:
+                    parts.append(pack_sized_string(self._section(name), self.link_flags.IsUnicode))
+        raw = self._raw_section('extra_data')
+        extra_data = self._section('extra_data') if raw is None else None
+        if raw is not None:
+            parts.append(raw)
+        elif extra_data:
+            parts.append(extra_data.bytes)
         else:
-            lnk.write(b'\x00\x00\x00\x00')
+            parts.append(b'\x00\x00\x00\x00')
+        return b''.join(parts)
+
+    @property
+    def header(self) -> LnkHeader:
+        # raw values of the parsed header are kept for fields not changed since parsing
+        raw = self._header
+        link_flags = self.link_flags.bytes
+        file_flags = self.file_flags.bytes
+        if raw is not None:
+            # bits unknown to Flags
+            link_flags |= raw.link_flags & ~((1 << len(_LINK_FLAGS)) - 1)
+            file_flags |= raw.file_flags & ~((1 << len(_FILE_ATTRIBUTES_FLAGS)) - 1)
+        times = [self.creation_time, self.access_time, self.modification_time]
+        for i, value in enumerate(times):
+            if raw is not None and value is self._header_times[i]:
+                times[i] = raw[2 + i]
+            else:
+                times[i] = convert_time_to_windows(value)
+        show_command = _SHOW_COMMAND_IDS[self._show_command]
+        if raw is not None and _SHOW_COMMANDS.get(raw.show_command, WINDOW_NORMAL) == self._show_command:
+            show_command = raw.show_command
+        if raw is not None and self._read_hot_key(raw.hot_key) == self.hot_key:
+            hot_key = raw.hot_key
+        else:
+            hot_key = self._hot_key_word(self.hot_key)
+        return LnkHeader(
+            link_flags, file_flags, *times,
+            self.file_size, self.icon_index, show_command, hot_key,
+        )
 
     def _get_shell_item_id_list(self):
-        return self._shell_item_id_list
+        return self._mutable_section('shell_item_id_list')
 
     def _set_shell_item_id_list(self, shell_item_id_list):
+        self._lazy_sections.pop('shell_item_id_list', None)
+        self._raw_sections.pop('shell_item_id_list', None)
         self._shell_item_id_list = shell_item_id_list
         self.link_flags.HasLinkTargetIDList = shell_item_id_list is not None
     shell_item_id_list = property(_get_shell_item_id_list, _set_shell_item_id_list)
 
     def _get_link_info(self):
-        return self._link_info
+        return self._mutable_section('link_info')
 
     def _set_link_info(self, link_info):
+        self._lazy_sections.pop('link_info', None)
+        self._raw_sections.pop('link_info', None)
         self._link_info = link_info
         self.link_flags.ForceNoLinkInfo = link_info is None
         self.link_flags.HasLinkInfo = link_info is not None
     link_info = property(_get_link_info, _set_link_info)
 
     def _get_description(self):
+        self._load_section('description')
         return self._description
 
     def _set_description(self, description):
+        self._lazy_sections.pop('description', None)
+        self._raw_sections.pop('description', None)
         self._description = description
         self.link_flags.HasName = description is not None
     description = property(_get_description, _set_description)
 
     def _get_relative_path(self):
+        self._load_section('relative_path')
         return self._relative_path
 
     def _set_relative_path(self, relative_path):
+        self._lazy_sections.pop('relative_path', None)
+        self._raw_sections.pop('relative_path', None)
         self._relative_path = relative_path
         self.link_flags.HasRelativePath = relative_path is not None
     relative_path = property(_get_relative_path, _set_relative_path)
 
     def _get_work_dir(self):
+        self._load_section('work_dir')
         return self._work_dir
 
     def _set_work_dir(self, work_dir):
+        self._lazy_sections.pop('work_dir', None)
+        self._raw_sections.pop('work_dir', None)
         self._work_dir = work_dir
         self.link_flags.HasWorkingDir = work_dir is not None
     work_dir = working_dir = property(_get_work_dir, _set_work_dir)
 
     def _get_arguments(self):
+        self._load_section('arguments')
         return self._arguments
 
     def _set_arguments(self, arguments):
+        self._lazy_sections.pop('arguments', None)
+        self._raw_sections.pop('arguments', None)
         self._arguments = arguments
         self.link_flags.HasArguments = arguments is not None
     arguments = property(_get_arguments, _set_arguments)
 
     def _get_icon(self):
+        self._load_section('icon')
         return self._icon
 
     def _set_icon(self, icon):
+        self._lazy_sections.pop('icon', None)
+        self._raw_sections.pop('icon', None)
         self._icon = icon
         self.link_flags.HasIconLocation = icon is not None
     icon = property(_get_icon, _set_icon)
+
+    def _get_extra_data(self):
+        return self._mutable_section('extra_data')
+
+    def _set_extra_data(self, extra_data):
+        self._lazy_sections.pop('extra_data', None)
+        self._raw_sections.pop('extra_data', None)
+        self._extra_data = extra_data
+    extra_data = property(_get_extra_data, _set_extra_data)
     
     def _get_window_mode(self):
         return self._show_command
@@ -1695,32 +2163,37 @@ class Lnk(object):
         # lnk can contains several different paths at different structures
         # here is some logic consistent with link properties at explorer (at least on test examples)
 
-        link_info_path = self._link_info.path if self._link_info and self._link_info.path else None
-        id_list_path = self._shell_item_id_list.get_path() if hasattr(self, '_shell_item_id_list') else None
-
-        env_var_path = None
-        if self.extra_data and self.extra_data.blocks:
-            for block in self.extra_data.blocks:
-                if type(block) == ExtraData_EnvironmentVariableDataBlock:
-                    env_var_path = block.target_unicode.strip('\x00') or block.target_ansi.strip('\x00')
-                    break
+        # sources are checked in order of priority, so lazy lnk decodes only sections it needs
 
+        self._load_section('shell_item_id_list')
+        id_list = getattr(self, '_shell_item_id_list', None)
+        id_list_path = id_list.get_path() if id_list is not None else None
         if id_list_path and id_list_path.startswith('%MY_COMPUTER%'):
             # full local path has priority
             return id_list_path[14:]
         if id_list_path and id_list_path.startswith('%USERPROFILE%\\::'):
             # path to KNOWN_FOLDER also has priority over link_info
             return id_list_path[14:]
-        if link_info_path:
+
+        link_info = self._section('link_info')
+        if link_info and link_info.path:
             # local path at link_info_path has priority over network path at id_list_path
             # full local path at link_info_path has priority over partial path at id_list_path
-            return link_info_path
-        if env_var_path:
-            # some links in Recent folder contains path only at ExtraData_EnvironmentVariableDataBlock
-            return env_var_path
+            return link_info.path
+
+        extra_data = self._section('extra_data')
+        if extra_data and extra_data.blocks:
+            for block in extra_data.blocks:
+                if type(block) == ExtraData_EnvironmentVariableDataBlock:
+                    env_var_path = block.target_unicode.strip('\x00') or block.target_ansi.strip('\x00')
+                    if env_var_path:
+                        # some links in Recent folder contains path only at ExtraData_EnvironmentVariableDataBlock
+                        return env_var_path
+                    break
         return id_list_path
 
     def specify_local_location(self, path, drive_type=None, drive_serial=None, volume_label=None):
+        self._mutable_section('link_info')
         self._link_info.drive_type = drive_type or DRIVE_UNKNOWN
         self._link_info.drive_serial = drive_serial or ''
         self._link_info.volume_label = volume_label or ''
@@ -1729,6 +2202,7 @@ class Lnk(object):
         self._link_info.make_path()
     
     def specify_remote_location(self, network_share_name, base_name):
+        self._mutable_section('link_info')
         self._link_info.network_share_name = network_share_name
         self._link_info.base_name = base_name
         self._link_info.remote = True
@@ -1743,9 +2217,9 @@ class Lnk(object):
         s += "\nFile size: %s" % self.file_size
         s += "\nWindow mode: %s" % self._show_command
         s += "\nHotkey: %s\n" % self.hot_key
-        s += str(self._link_info)
+        s += str(self._section('link_info'))
         if self.link_flags.HasLinkTargetIDList:
-            s += "\n%s" % self.shell_item_id_list
+            s += "\n%s" % self._section('shell_item_id_list')
         if self.link_flags.HasName:
             s += "\nDescription: %s" % self.description
         if self.link_flags.HasRelativePath:
@@ -1756,57 +2230,808 @@ class Lnk(object):
             s += "\nCommandline Arguments: %s" % self.arguments
         if self.link_flags.HasIconLocation:
             s += "\nIcon: %s" % self.icon
-        if self._link_info:
+        if self._section('link_info'):
             s += "\nUsed Path: %s" % self.path
-        if self.extra_data:
-            s += str(self.extra_data)
+        extra_data = self._section('extra_data')
+        if extra_data:
+            s += str(extra_data)
         return s
 
 
 # ---- convenience functions
 
-def parse(lnk):
-    return Lnk(lnk)
+def _is_identical(filename, data):
+    # compares sizes first, so only files of the same size are read
+    try:
+        with open(filename, 'rb') as f:
+            if os.fstat(f.fileno()).st_size != len(data):
+                return False
+            return f.read() == data
+    except OSError:
+        return False
+
+
+def _fsync_file(filename):
+    with open(filename, 'r+b') as f:
+        os.fsync(f.fileno())
+
+
+def _fsync_directory(directory):
+    # makes renames durable, directories can't be opened for that on Windows
+    if os.name == 'nt':
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class SaveBatch(object):
+    """
+    Context manager for atomic saves (see write_atomic) of many files.
+    Data is written to temporary files, which are synced and renamed over the targets at commit (at exit),
+    so each directory is synced once for all its files.
+    Until commit the targets keep their old content, a crash leaves them intact.
+    """
+
+    def __init__(self):
+        self._pending = []  # (temporary file, target)
+
+    def add(self, temp, filename):
+        self._pending.append((temp, filename))
+
+    def save(self, lnk, filename, skip_if_identical=False) -> bool:
+        return lnk.save(filename, skip_if_identical=skip_if_identical, batch=self)
+
+    def commit(self):
+        pending, self._pending = self._pending, []
+        try:
+            for temp, _ in pending:
+                _fsync_file(temp)
+            directories = {}  # ordered set
+            for temp, filename in pending:
+                os.replace(temp, filename)
+                directories[os.path.dirname(os.path.abspath(filename))] = None
+        except BaseException:
+            for temp, _ in pending:
+                _unlink(temp)  # renamed ones are already missing
+            raise
+        for directory in directories:
+            _fsync_directory(directory)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # complete files written before an error are replaced too
+        self.commit()
+
+
+def _unlink(filename):
+    try:
+        os.unlink(filename)
+    except OSError:
+        pass
+
+
+def _create_temp(directory):
+    # unlike tempfile.mkstemp (0600) the kernel applies umask to 0666 just like for open()
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0)
+    while True:
+        temp = os.path.join(directory, '.%s.tmp' % os.urandom(8).hex())
+        try:
+            return os.open(temp, flags, 0o666), temp
+        except FileExistsError:
+            continue
+
+
+def write_atomic(filename, data, batch: Optional[SaveBatch] = None):
+    """
+    Replaces file content at once: data is written and synced to temporary file at the same directory,
+    which is renamed over the original, so readers see either old or new content
+    and a crash doesn't leave truncated file. Directory is synced before return.
+    With batch the rename and all syncs are deferred until commit of the batch.
+    """
+    directory = os.path.dirname(filename) or '.'
+    fd, temp = _create_temp(directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            if batch is None:
+                f.flush()
+                os.fsync(f.fileno())
+        if os.path.exists(filename):
+            shutil.copymode(filename, temp)
+        if batch is not None:
+            batch.add(temp, filename)
+            return
+        os.replace(temp, filename)
+    except BaseException:
+        _unlink(temp)
+        raise
+    _fsync_directory(directory)
+
+
+def _save_bytes(filename, data, skip_if_identical=False, atomic=False, batch=None):
+    if skip_if_identical and _is_identical(filename, data):
+        return False
+    if atomic or batch is not None:
+        write_atomic(filename, data, batch)
+        return True
+    with open(filename, 'wb') as f:
+        f.write(data)
+    return True
+
+
+class SaveStats(NamedTuple):
+    written: int
+    skipped: int
+
+
+def save_many(items, skip_if_identical=True, atomic=False) -> SaveStats:
+    """
+    Writes lnk files from pairs (filename, Lnk or its bytes).
+    Files with the same content are not written with skip_if_identical=True (default),
+    so their modification time is kept. With atomic=True files are written
+    at one SaveBatch. Returns counts of written and skipped files.
+    """
+    written = skipped = 0
+    with SaveBatch() as batch:
+        for filename, lnk in items:
+            data = lnk if isinstance(lnk, (bytes, bytearray)) else lnk.to_bytes()
+            if _save_bytes(filename, data, skip_if_identical, batch=batch if atomic else None):
+                written += 1
+            else:
+                skipped += 1
+    return SaveStats(written, skipped)
+
+
+def parse(lnk, fields=None):
+    """
+    Parses lnk file (filename or binary stream, non-seekable streams are read forward only).
+    If fields (dotted props paths, ex.: ['path', 'link_info.drive_type']) are given,
+    only sections required for them are decoded, other are decoded at first access.
+    """
+    if fields is None:
+        return Lnk(lnk)
+    lnk = Lnk(lnk, lazy=True)
+    for field in fields:
+        get_prop(lnk, field.split('.'))
+    return lnk
+
+
+def peek(f) -> LnkHeader:
+    """
+    Reads only the ShellLinkHeader of lnk file (filename or binary stream)
+    with a single read of HEADER_SIZE bytes, streams are read from their current position.
+    """
+    if isinstance(f, str):
+        with open(f, 'rb', buffering=0) as stream:
+            data = stream.read(HEADER_SIZE)
+    else:
+        data = f.read(HEADER_SIZE)
+    return unpack_header(data)
+
+
+def _read_up_to(f, size):
+    # raw streams (pipes, sockets) may return less than requested at once, less is returned only at the end
+    data = f.read(size)
+    while len(data) < size:
+        chunk = f.read(size - len(data))
+        if not chunk:
+            break
+        data += chunk
+    return data
+
+
+def _read_exactly(f, size):
+    data = _read_up_to(f, size)
+    if len(data) < size:
+        raise FormatException("Unexpected end of stream: %d of %d bytes read" % (len(data), size))
+    return data
+
+
+def read_lnk_stream(f) -> bytes:
+    """
+    Reads bytes of exactly one lnk from binary stream at its current position.
+    Sections are read in one forward pass by their declared sizes without seeking,
+    so non-seekable streams (pipes, sockets, sys.stdin.buffer) are supported.
+    Header is checked before anything else is read, the total size is limited by MAX_LNK_SIZE.
+    """
+    header = _read_up_to(f, HEADER_SIZE)
+    link_flags = Flags(_LINK_FLAGS, unpack_header(header).link_flags)
+    parts = [header]
+    if link_flags.HasLinkTargetIDList:
+        size = _read_exactly(f, 2)
+        parts += [size, _read_exactly(f, unpack_short(size, 0))]
+    if link_flags.HasLinkInfo and not link_flags.ForceNoLinkInfo:
+        size = _read_exactly(f, 4)
+        link_info_size = unpack_int(size, 0)
+        if not 4 <= link_info_size <= MAX_BLOCK_SIZE:
+            raise FormatException("Invalid LinkInfo size %d" % link_info_size)
+        parts += [size, _read_exactly(f, link_info_size - 4)]
+    char_size = 2 if link_flags.IsUnicode else 1
+    for _, flag in _STRING_DATA:
+        if link_flags[flag]:
+            size = _read_exactly(f, 2)
+            parts += [size, _read_exactly(f, unpack_short(size, 0) * char_size)]
+    total = sum(len(part) for part in parts)
+    while True:  # ExtraData blocks until TerminalBlock
+        size = _read_exactly(f, 4)
+        parts.append(size)
+        block_size = unpack_int(size, 0)
+        if block_size < 4:
+            break
+        if block_size > MAX_BLOCK_SIZE:
+            raise FormatException("ExtraData block size %d exceeds the limit %d" % (block_size, MAX_BLOCK_SIZE))
+        total += block_size
+        if total > MAX_LNK_SIZE:
+            raise FormatException("Lnk size exceeds the limit %d" % MAX_LNK_SIZE)
+        parts.append(_read_exactly(f, block_size - 4))
+    return b''.join(parts)
+
+
+class LnkRecord(NamedTuple):
+    """
+    Flat summary of Lnk with raw header values (FILETIMEs, flag words),
+    cheap to pickle for transfer between processes.
+    """
+    path: Optional[str]
+    link_flags: int
+    file_flags: int
+    creation_time: int  # FILETIME
+    access_time: int  # FILETIME
+    modification_time: int  # FILETIME
+    file_size: int
+    icon_index: int
+    show_command: int
+    hot_key: int
+    description: Optional[str]
+    relative_path: Optional[str]
+    work_dir: Optional[str]
+    arguments: Optional[str]
+    icon: Optional[str]
+
+    @classmethod
+    def from_lnk(cls, lnk: Lnk) -> 'LnkRecord':
+        return cls(
+            lnk.path, *lnk.header,
+            lnk.description, lnk.relative_path, lnk.work_dir, lnk.arguments, lnk.icon,
+        )
+
+    @property
+    def header(self) -> LnkHeader:
+        return LnkHeader._make(self[1:10])
+
+
+class ParseResult(NamedTuple):
+    path: str
+    lnk: Optional[Union[Lnk, LnkRecord]]
+    error: Optional[Exception]
+
+
+def _chunks(items, size):
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _map_chunks(func, items, workers=None, chunksize=64, ordered=True):
+    # runs func(list_of_items) -> list_of_results at process pool,
+    # only a few chunks per worker are in flight, so items may be an endless iterator
+    window = 2 * (workers or os.cpu_count() or 1)
+    chunks = _chunks(items, chunksize)
+    executor = ProcessPoolExecutor(workers)
+    try:
+        pending = []
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < window:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    exhausted = True
+                else:
+                    pending.append(executor.submit(func, chunk))
+            if not pending:
+                return
+            if ordered:
+                done = [pending.pop(0)]
+            else:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                done = [future for future in pending if future in finished]
+                pending = [future for future in pending if future not in finished]
+            for future in done:
+                yield from future.result()
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def _parse_chunk(paths, records=False):
+    results = []
+    for path in paths:
+        try:
+            lnk = Lnk(path)
+            if records:
+                lnk = LnkRecord.from_lnk(lnk)
+            results.append(ParseResult(path, lnk, None))
+        except Exception as e:
+            results.append(ParseResult(path, None, e))
+    return results
+
+
+def _parse_records_chunk(paths):
+    return _parse_chunk(paths, records=True)
+
+
+def parse_many(paths, workers=None, chunksize=64, ordered=True, records=False):
+    """
+    Parses lnk files at process pool of given workers (cpu count by default).
+    Yields ParseResult(path, lnk, error) for each path, at the order of paths
+    or as soon as parsed with ordered=False. Parsing errors are returned, not raised.
+    With records=True LnkRecord is returned instead of Lnk, which is much cheaper to transfer.
+    """
+    func = _parse_records_chunk if records else _parse_chunk
+    return _map_chunks(func, paths, workers, chunksize, ordered)
 
 
-def create(f=None):
-    lnk = Lnk()
+def patch(f, **strings):
+    """
+    Changes string data of lnk file in place, without full parsing and serialization.
+    Accepts description, relative_path, work_dir, arguments and icon, None removes the string.
+    The file is read once and rewritten once starting from the first changed byte.
+    Returns True if file was changed.
+    """
+    with open(f, 'r+b') as stream:
+        data = stream.read()
+        changed, start = patch_bytes(data, **strings)
+        if start is None:
+            return False
+        stream.seek(start)
+        stream.write(as_view(changed)[start:])
+        stream.truncate()
+    return True
+
+
+def patch_bytes(data, **strings):
+    """
+    Changes string data of lnk bytes, see patch().
+    Returns new data and offset of its first changed byte (None if nothing changed).
+    """
+    for name in strings:
+        if name not in _STRING_NAMES:
+            raise TypeError("Unknown string data field: %s" % name)
+    lnk = Lnk.from_buffer(data, lazy=True)
+    buf = lnk._lazy_buffer
+    sections = lnk._lazy_sections
+    link_flags = lnk.link_flags.bytes
+    changes = []
+    for name, flag in _STRING_DATA:
+        if name not in strings:
+            continue
+        value = strings[name]
+        if name in sections:
+            start = sections[name]
+            end = lnk._skip_section(buf, name, start)
+        else:
+            # absent string is inserted before the next present section
+            following = _STRING_NAMES[_STRING_NAMES.index(name) + 1:] + ('extra_data',)
+            start = end = next(sections[section] for section in following if section in sections)
+        if value is None:
+            encoded = b''
+        elif len(value) > 0xFFFF:
+            raise ValueError("String is too long for lnk: %s" % name)
+        else:
+            encoded = pack_sized_string(value, lnk.link_flags.IsUnicode)
+        lnk.link_flags[flag] = value is not None
+        if buf[start:end] != encoded:
+            changes.append((start, end, encoded))
+    if lnk.link_flags.bytes != link_flags:
+        # link flags at the header
+        changes.insert(0, (20, 24, _INT.pack(lnk.header.link_flags)))
+    if not changes:
+        return data, None
+    first = changes[0][0]
+    result = bytearray(buf[:first])
+    pos = first
+    for start, end, encoded in changes:
+        result += buf[pos:start]
+        result += encoded
+        pos = end
+    result += buf[pos:]
+    return bytes(result), first
+
+
+class LnkTemplate(object):
+    """
+    Prototype lnk compiled for fast creation of many lnk files which differ
+    only in slots: target file name, arguments, description and icon.
+    Bytes of the prototype are copied, only the regions of slots are encoded for each lnk.
+    Target file name is replaced at the IDList, LinkInfo, relative path and EnvironmentVariableDataBlock,
+    other data (timestamps, file size, property stores) is the same as at the prototype.
+    """
+    SLOTS = ('target', 'arguments', 'description', 'icon')
+
+    def __init__(self, prototype: Lnk):
+        data = prototype.to_bytes()
+        lnk = Lnk.from_buffer(data, lazy=True)
+        buf = lnk._lazy_buffer
+        # section name -> (start, end) offsets at data
+        self._sections = {
+            name: (start, lnk._skip_section(buf, name, start))
+            for name, start in lnk._lazy_sections.items()
+        }
+        self._data = data
+        self._link_flags = lnk._header.link_flags
+        self._unicode = lnk.link_flags.IsUnicode
+        self._strings = {name: lnk._section(name) for name in _STRING_NAMES if name in self._sections}
+        if 'shell_item_id_list' in self._sections:
+            items = lnk._section('shell_item_id_list').items
+            if any(type(item) not in (RootEntry, DriveEntry, PathSegmentEntry) for item in items):
+                raise ValueError("IDList of prototype has unsupported entries (ex.: UWP app)")
+        path = lnk.path
+        if not path:
+            raise ValueError("Prototype has no target path")
+        self._directory, self._name = ntpath.split(path)
+        self._id_list = self._compile_id_list(lnk, buf)
+        self._link_info = self._compile_link_info(lnk)
+        self._env_block = self._compile_env_block(buf)
+
+    def _is_target(self, path):
+        # path ends with the target file name of the prototype
+        if not isinstance(path, str):
+            return False
+        prefix = path[:len(path) - len(self._name)]
+        return path[len(prefix):].lower() == self._name.lower() and prefix[-1:] in ('', '\\')
+
+    def _compile_id_list(self, lnk, buf):
+        # raw entries before the target entry, and the target entry to encode with new names
+        if 'shell_item_id_list' not in self._sections:
+            return None
+        items = lnk._section('shell_item_id_list').items
+        if not items or type(items[-1]) != PathSegmentEntry or not self._is_target(items[-1].full_name):
+            raise ValueError("IDList of prototype doesn't end with its target")
+        start, _ = self._sections['shell_item_id_list']
+        pos = last = start + 2
+        while unpack_short(buf, pos):  # until terminator
+            last = pos
+            pos += unpack_short(buf, pos)
+        segment = copy(items[-1])
+        segment.type = segment.type.replace(' (UNICODE)', '')
+        return self._data[start + 2:last], segment
+
+    def _compile_link_info(self, lnk):
+        # offsets of the paths ending with the target
+        if 'link_info' not in self._sections:
+            return None
+        start, _ = self._sections['link_info']
+        link_info = lnk._section('link_info')
+        if link_info.header_size >= _LINK_INFO_HEADER_OPTIONAL:
+            raise ValueError("LinkInfo with unicode paths is not supported")
+        regions = []
+        if link_info.local and self._is_target(link_info.local_base_path):
+            regions.append((start + link_info.offs_local_base_path, link_info.local_base_path))
+        if link_info.remote and self._is_target(link_info.base_name):
+            regions.append((start + link_info.offs_base_name, link_info.base_name))
+        if not regions:
+            raise ValueError("LinkInfo of prototype doesn't point to its target")
+        return sorted(regions)
+
+    def _compile_env_block(self, buf):
+        # offsets of EnvironmentVariableDataBlock and path of target folder at it
+        pos, _ = self._sections['extra_data']
+        size = unpack_int(buf, pos)
+        while size >= 4:  # until TerminalBlock
+            if unpack_int(buf, pos + 4) == 0xA0000001:
+                block = ExtraData_EnvironmentVariableDataBlock(buf[pos + 8:pos + size])
+                target = block.target_unicode.split('\x00')[0] or block.target_ansi.split('\x00')[0]
+                if self._is_target(target):
+                    return pos, pos + size, target[:len(target) - len(self._name)]
+            pos += size
+            size = unpack_int(buf, pos)
+        return None
+
+    def _target_name(self, target):
+        directory, name = ntpath.split(target)
+        if not name:
+            raise ValueError("Target file name is missing: %s" % target)
+        if directory and ntpath.normcase(directory) != ntpath.normcase(self._directory):
+            raise ValueError("Target must be at the folder of the prototype target: %s" % self._directory)
+        return name
+
+    def _render_id_list(self, name):
+        prefix, segment = self._id_list
+        segment = copy(segment)
+        segment.short_name = segment.full_name = name
+        entry = segment.bytes
+        id_list = prefix + _SHORT.pack(len(entry) + 2) + entry + b'\x00\x00'
+        return _SHORT.pack(len(id_list)) + id_list
+
+    def _render_link_info(self, name):
+        # paths are replaced, sizes and offsets of the following fields are shifted
+        data = self._data
+        start, end = self._sections['link_info']
+        header = list(unpack_from(_LINK_INFO_HEADER, data, start))
+        parts = []
+        shifts = []
+        pos = start + _LINK_INFO_HEADER.size
+        for offset, path in self._link_info:
+            old = path.encode(DEFAULT_CHARSET)
+            new = (path[:len(path) - len(self._name)] + name).encode(DEFAULT_CHARSET)
+            parts += [data[pos:offset], new]
+            pos = offset + len(old)
+            shifts.append((offset - start, len(new) - len(old)))
+        parts.append(data[pos:end])
+        for i in range(3, 7):  # offsets of the LinkInfo parts
+            if header[i]:
+                header[i] += sum(delta for offset, delta in shifts if offset < header[i])
+        body = b''.join(parts)
+        header[0] = _LINK_INFO_HEADER.size + len(body)
+        return _LINK_INFO_HEADER.pack(*header) + body
+
+    def _render_extra_data(self, name):
+        data = self._data
+        start, end = self._sections['extra_data']
+        if self._env_block is None:
+            return data[start:end]
+        block_start, block_end, directory = self._env_block
+        block = ExtraData_EnvironmentVariableDataBlock()
+        block.target_ansi = block.target_unicode = directory + name
+        if len(block.target_unicode) >= 260:
+            raise ValueError("Path is too long for EnvironmentVariableDataBlock: %s" % block.target_unicode)
+        return data[start:block_start] + block.bytes() + data[block_end:end]
+
+    def render(self, **slots) -> bytes:
+        """
+        Returns bytes of new lnk, slots not given are taken from the prototype, None removes the string.
+        Target is a file name or a full path at the folder of the prototype target.
+        """
+        for slot in slots:
+            if slot not in self.SLOTS:
+                raise TypeError("Unknown slot: %s" % slot)
+        target = slots.pop('target', None)
+        name = self._name if target is None else self._target_name(target)
+        renamed = name != self._name
+        strings = dict(self._strings, **slots)
+        relative_path = strings.get('relative_path')
+        if renamed and self._is_target(relative_path):
+            strings['relative_path'] = relative_path[:len(relative_path) - len(self._name)] + name
+
+        data = self._data
+        sections = self._sections
+        link_flags = self._link_flags
+        for string_name, flag in _STRING_DATA:
+            bit = 1 << _LINK_FLAGS.index(flag)
+            if strings.get(string_name) is None:
+                link_flags &= ~bit
+            else:
+                link_flags |= bit
+        parts = [data[:20], _INT.pack(link_flags), data[24:HEADER_SIZE]]
+        if 'shell_item_id_list' in sections:
+            start, end = sections['shell_item_id_list']
+            parts.append(self._render_id_list(name) if renamed else data[start:end])
+        if 'link_info' in sections:
+            start, end = sections['link_info']
+            parts.append(self._render_link_info(name) if renamed else data[start:end])
+        for string_name in _STRING_NAMES:
+            value = strings.get(string_name)
+            if value is None:
+                continue
+            if string_name in sections and value is self._strings[string_name]:
+                start, end = sections[string_name]
+                parts.append(data[start:end])
+            else:
+                parts.append(pack_sized_string(value, self._unicode))
+        if renamed:
+            parts.append(self._render_extra_data(name))
+        else:
+            start, end = sections['extra_data']
+            parts.append(data[start:end])
+        return b''.join(parts)
+
+    def save(self, f, **slots):
+        """
+        Writes new lnk (see render) to filename or binary stream.
+        """
+        data = self.render(**slots)
+        if hasattr(f, 'write'):
+            f.write(data)
+        else:
+            with open(f, 'wb') as out:
+                out.write(data)
+
+
+def create(f=None, clock=None, deterministic=False):
+    lnk = Lnk(clock=clock, deterministic=deterministic)
     lnk.file = f
     return lnk
 
 
+def _path_key(path):
+    return ntpath.normcase(ntpath.normpath(path))
+
+
+def no_filesystem(path):
+    """
+    Metadata provider without any knowledge and filesystem calls:
+    defaults of PathMetadata are used for all paths (folders for all but target).
+    """
+    return None
+
+
+class MetadataInventory(object):
+    """
+    Metadata provider backed by PathMetadata of known paths (keyed by normalized Windows path).
+    Unknown paths get defaults of PathMetadata without filesystem calls.
+    """
+
+    def __init__(self, items=None):
+        self._items = {}
+        if isinstance(items, dict):
+            items = items.items()
+        for path, metadata in items or ():
+            self.add(path, metadata)
+
+    def add(self, path, metadata):
+        self._items[_path_key(path)] = PathMetadata(*metadata)
+
+    def lookup(self, paths):
+        return {path: self._items.get(_path_key(path)) for path in paths}
+
+    @classmethod
+    def from_csv(cls, f):
+        """
+        Reads CSV manifest (filename or text stream) with header and columns:
+        path, type (FILE or FOLDER), size, created, modified, accessed (ISO format);
+        all columns except path are optional.
+        """
+        if isinstance(f, str):
+            with open(f, newline='', encoding='utf-8') as stream:
+                return cls.from_csv(stream)
+        inventory = cls()
+        for row in csv.DictReader(f):
+            values = {}
+            if row.get('type'):
+                values['type'] = row['type'].upper()
+            if row.get('size'):
+                values['size'] = int(row['size'])
+            for name in ('created', 'modified', 'accessed'):
+                if row.get(name):
+                    values[name] = datetime.fromisoformat(row[name])
+            inventory.add(row['path'], PathMetadata(**values))
+        return inventory
+
+    def __len__(self):
+        return len(self._items)
+
+
+def _lookup_metadata(provider, paths):
+    # provider is object with batch lookup(paths) -> {path: metadata}, mapping or callable(path) -> metadata,
+    # paths unknown to provider get defaults: target is a file, all others are folders
+    if hasattr(provider, 'lookup'):
+        found = provider.lookup(paths)
+        results = [found.get(path) for path in paths]
+    elif hasattr(provider, 'get'):
+        results = [provider.get(path) for path in paths]
+    else:
+        results = [provider(path) for path in paths]
+    for i, metadata in enumerate(results):
+        if metadata is None:
+            results[i] = PathMetadata(TYPE_FILE if i == len(paths) - 1 else TYPE_FOLDER)
+        elif not isinstance(metadata, PathMetadata):
+            results[i] = PathMetadata(*metadata)
+    return results
+
+
+class SegmentCache(object):
+    """
+    Bounded LRU cache of PathSegmentEntry of folders, keyed by normalized path,
+    so bulk creation of lnk files (see for_file) stats each shared ancestor folder once.
+    Entries expire after ttl seconds (if given) or are dropped by invalidate().
+    """
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # key -> (entry, expiration time or None)
+        self._entries = OrderedDict()
+
+    def get(self, path, metadata: Optional[PathMetadata] = None, clock=datetime.now) -> PathSegmentEntry:
+        # entries are copied, as encoding and callers may change them
+        key = _path_key(path)
+        now = time.monotonic()
+        cached = self._entries.get(key)
+        if cached is not None and (cached[1] is None or cached[1] > now):
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy(cached[0])
+        self.misses += 1
+        entry = PathSegmentEntry.create_for_path(path, metadata, clock)
+        self._entries[key] = (entry, None if self.ttl is None else now + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return copy(entry)
+
+    def invalidate(self, path=None):
+        """
+        Drops cached folder with all its subfolders, or all entries if path is None.
+        """
+        if path is None:
+            self._entries.clear()
+            return
+        key = _path_key(path)
+        prefix = key.rstrip('\\') + '\\'
+        for cached in [cached for cached in self._entries if cached == key or cached.startswith(prefix)]:
+            del self._entries[cached]
+
+    def __len__(self):
+        return len(self._entries)
+
+
 def for_file(
     target_file, lnk_name=None, arguments=None, description=None, icon_file=None, icon_index=0,
-    work_dir=None, window_mode=None,
+    work_dir=None, window_mode=None, segment_cache: Optional[SegmentCache] = None, metadata=None,
+    clock=None, deterministic=False,
 ):
-    lnk = create(lnk_name)
+    """
+    Creates lnk to the file (or folder) by its Windows-like path, saves it if lnk_name is given.
+    Folders of the path are read through segment_cache if given, see SegmentCache.
+    With metadata provider (see from_segment_list) filesystem is not used,
+    times and size of the target are taken to the header too.
+    Times of the header and non-existed paths are given by clock (datetime.now by default),
+    deterministic=True gives the same bytes for the same arguments (see fixed_clock).
+    """
+    clock = _make_clock(clock, deterministic)
+    lnk = create(lnk_name, clock=clock)
     lnk.link_flags.IsUnicode = True
     lnk.link_info = None
+    target_metadata = None
     if target_file.startswith('\\\\'):
         # remote link
         lnk.link_info = LinkInfo()
         lnk.link_info.remote = 1
         # extract server + share name from full path
-        path_parts = target_file.split('\\')
-        share_name, base_name = '\\'.join(path_parts[:4]), '\\'.join(path_parts[4:])
+        share_name, _ = _split_share(target_file)
         lnk.link_info.network_share_name = share_name.upper()
-        lnk.link_info.base_name = base_name
+        # LinkInfo points only to the share, full path is kept at EnvironmentVariableDataBlock
+        lnk.link_info.base_name = ''
         # somehow it requires EnvironmentVariableDataBlock & HasExpString flag
         env_data_block = ExtraData_EnvironmentVariableDataBlock()
         env_data_block.target_ansi = target_file
         env_data_block.target_unicode = target_file
         lnk.extra_data = ExtraData(blocks=[env_data_block])
         lnk.link_flags.HasExpString = True
+        if metadata is not None:
+            target_metadata, = _lookup_metadata(metadata, [target_file])
     else:
         # local link
         levels = list(path_levels(target_file))
         elements = [RootEntry(ROOT_MY_COMPUTER),
                     DriveEntry(levels[0])]
-        for level in levels[1:]:
-            segment = PathSegmentEntry.create_for_path(level)
-            elements.append(segment)
+        paths = levels[1:]
+        found = _lookup_metadata(metadata, paths) if metadata is not None else [None] * len(paths)
+        for level, level_metadata in zip(paths[:-1], found):
+            if segment_cache is not None:
+                elements.append(segment_cache.get(level, level_metadata, clock))
+            else:
+                elements.append(PathSegmentEntry.create_for_path(level, level_metadata, clock))
+        if paths:
+            elements.append(PathSegmentEntry.create_for_path(paths[-1], found[-1], clock))
+            target_metadata = found[-1]
         lnk.shell_item_id_list = LinkTargetIDList()
         lnk.shell_item_id_list.items = elements
+    if target_metadata is not None:
+        lnk.creation_time = target_metadata.created
+        lnk.modification_time = target_metadata.modified
+        lnk.access_time = target_metadata.accessed
+        lnk.file_size = target_metadata.size
+        lnk.file_flags.directory = target_metadata.type == TYPE_FOLDER
     # lnk.link_flags.HasLinkInfo = True
     if arguments:
         lnk.link_flags.HasArguments = True
@@ -1828,7 +3053,91 @@ def for_file(
     return lnk
 
 
-def from_segment_list(data, lnk_name=None):
+MANIFEST_FIELDS = (
+    'target', 'name', 'arguments', 'description', 'icon', 'icon_index', 'work_dir', 'window_mode',
+)
+
+
+class CreateResult(NamedTuple):
+    index: int  # number of record, starting from 1
+    name: Optional[str]
+    error: Optional[Exception]
+    written: bool = False  # False for errors and skipped identical files
+
+
+def read_manifest(f):
+    """
+    Reads records for create_many() from manifest file:
+    CSV with header (by .csv extension) or JSON lines with MANIFEST_FIELDS.
+    Yields dicts, or exceptions for records which can't be read.
+    """
+    with open(f, newline='', encoding='utf-8') as stream:
+        if f.lower().endswith('.csv'):
+            for row in csv.DictReader(stream):
+                yield {key: value for key, value in row.items() if value != ''}
+            return
+        for line in stream:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                yield FormatException("Invalid JSON: %s" % e)
+
+
+def _create_record(record, segment_cache=None, skip_if_identical=False, deterministic=False, batch=None):
+    if isinstance(record, Exception):
+        raise record
+    unknown = [str(key) for key in record if key not in MANIFEST_FIELDS]
+    if unknown:
+        raise TypeError("Unknown manifest fields: %s" % ', '.join(unknown))
+    if not record.get('target') or not record.get('name'):
+        raise MissingInformationException("Target and name are required")
+    lnk = for_file(
+        record['target'], arguments=record.get('arguments'),
+        description=record.get('description'), icon_file=record.get('icon'),
+        icon_index=int(record.get('icon_index') or 0), work_dir=record.get('work_dir'),
+        window_mode=record.get('window_mode'), segment_cache=segment_cache, deterministic=deterministic,
+    )
+    return lnk.save(record['name'], skip_if_identical=skip_if_identical, batch=batch)
+
+
+def _create_chunk(records, skip_if_identical=False, deterministic=False, atomic=False):
+    # ancestor folders shared by records of the chunk are stat'ed once,
+    # atomic saves of the chunk are synced at once
+    segment_cache = SegmentCache()
+    results = []
+    with SaveBatch() as batch:
+        for index, record in records:
+            name = record.get('name') if isinstance(record, dict) else None
+            try:
+                written = _create_record(
+                    record, segment_cache, skip_if_identical, deterministic, batch if atomic else None,
+                )
+                results.append(CreateResult(index, name, None, written))
+            except Exception as e:
+                results.append(CreateResult(index, name, e))
+    return results
+
+
+def create_many(
+    records, workers=None, chunksize=64, skip_if_identical=False, deterministic=False, atomic=False,
+):
+    """
+    Creates lnk files from records (dicts with MANIFEST_FIELDS, parameters of for_file) at process pool.
+    Yields CreateResult(index, name, error, written) for each record as soon as it created.
+    Errors are returned, not raised.
+    Existed files with the same content are not written with skip_if_identical=True,
+    which makes sense only with deterministic=True or existed targets (see for_file).
+    With atomic=True files are replaced at once, files and directories are synced once per chunk.
+    """
+    func = partial(
+        _create_chunk, skip_if_identical=skip_if_identical, deterministic=deterministic, atomic=atomic,
+    )
+    return _map_chunks(func, enumerate(records, 1), workers, chunksize, ordered=False)
+
+
+def from_segment_list(data, lnk_name=None, metadata=None, clock=None, deterministic=False):
     """
     Creates a lnk file from a list of path segments.
     If lnk_name is given, the resulting lnk will be saved
@@ -1854,19 +3163,37 @@ def from_segment_list(data, lnk_name=None):
     
     For relative paths just omit the drive entry.
     Hint: Correct dates really are not crucial for working lnks.
+
+    With metadata provider segments may contain only names (dict or just string),
+    missing values are taken from metadata of the full path. Provider is
+    an object with batch lookup(paths) -> {path: PathMetadata} (ex.: MetadataInventory),
+    a mapping or a callable(path) -> PathMetadata, unknown paths (None) get defaults,
+    no_filesystem provider uses defaults for everything.
+    Header times and missing times of segments are given by clock
+    or fixed with deterministic=True, see for_file.
     """
     if type(data) not in (list, tuple):
         raise ValueError("Invalid data format, list or tuple expected")
-    lnk = Lnk()
+    clock = _make_clock(clock, deterministic)
+    lnk = Lnk(clock=clock)
     entries = []
+    path = ''
     if is_drive(data[0]):
         # this is an absolute link
         entries.append(RootEntry(ROOT_MY_COMPUTER))
         if not data[0].endswith('\\'):
             data[0] += "\\"
-        drive = data.pop(0).encode("ascii")
-        entries.append(DriveEntry(drive))
-    for level in data:
+        path = data.pop(0)
+        entries.append(DriveEntry(path))
+    levels = [{'name': level} if isinstance(level, str) else level for level in data]
+    if metadata is not None:
+        paths = []
+        for level in levels:
+            path = ntpath.join(path, level['name'])
+            paths.append(path)
+        found = _lookup_metadata(metadata, paths)
+        levels = [dict(level_metadata._asdict(), **level) for level, level_metadata in zip(levels, found)]
+    for level in levels:
         segment = PathSegmentEntry()
         segment.type = level['type']
         if level['type'] == TYPE_FOLDER:
@@ -1875,13 +3202,14 @@ def from_segment_list(data, lnk_name=None):
             segment.file_size = level['size']
         segment.short_name = level['name']
         segment.full_name = level['name']
-        segment.created = level['created']
-        segment.modified = level['modified']
-        segment.accessed = level['accessed']
+        segment.created = level.get('created')
+        segment.modified = level.get('modified')
+        segment.accessed = level.get('accessed')
+        segment.fill_times(clock)
         entries.append(segment)
     lnk.shell_item_id_list = LinkTargetIDList()
     lnk.shell_item_id_list.items = entries
-    if data[-1]['type'] == TYPE_FOLDER:
+    if levels[-1]['type'] == TYPE_FOLDER:
         lnk.file_flags.directory = True
     if lnk_name:
         lnk.save(lnk_name)
@@ -1889,7 +3217,7 @@ def from_segment_list(data, lnk_name=None):
 
 
 def build_uwp(
-    package_family_name, target, location=None,logo44x44=None, lnk_name=None,
+    package_family_name, target, location=None,logo44x44=None, lnk_name=None, clock=None, deterministic=False,
 ) -> Lnk:
     """
     :param lnk_name:            ex.: crafted_uwp.lnk
@@ -1897,8 +3225,10 @@ def build_uwp(
     :param target:              ex.: Microsoft.WindowsCalculator_8wekyb3d8bbwe!App
     :param location:            ex.: C:\\Program Files\\WindowsApps\\Microsoft.WindowsCalculator_10.1910.0.0_x64__8wekyb3d8bbwe
     :param logo44x44:           ex.: Assets\\CalculatorAppList.png
+    :param clock:               callable returning datetime for header times
+    :param deterministic:       use fixed header times (see fixed_clock)
     """
-    lnk = Lnk()
+    lnk = Lnk(clock=clock, deterministic=deterministic)
     lnk.link_flags.HasLinkTargetIDList = True
     lnk.link_flags.IsUnicode = True
     lnk.link_flags.EnableTargetMetadata = True
@@ -1929,56 +3259,751 @@ def get_prop(obj, prop_queue):
     return attr
 
 
+# ---- scanning directory trees
+
+SCAN_FIELDS = (
+    'path', 'description', 'relative_path', 'work_dir', 'arguments', 'icon',
+    'creation_time', 'access_time', 'modification_time', 'file_size',
+)
+
+
+def walk_files(root):
+    # iterative os.scandir walk, memory depends only on the depth of the tree
+    stack = [root]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            yield entry.path
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return value.decode(DEFAULT_CHARSET, 'replace')
+    return str(value)
+
+
+def _read_lnk_file(filename):
+    # whole file content, or None for files without lnk signature
+    with open(filename, 'rb') as f:
+        data = f.read(20)
+        if data[:4] != _SIGNATURE or data[4:] != _GUID:
+            return None
+        return data + f.read()
+
+
+def _scan_file(filename, fields):
+    # returns json line, or None for files without lnk signature
+    try:
+        data = _read_lnk_file(filename)
+        if data is None:
+            return None
+        lnk = Lnk.from_buffer(data, lazy=True)
+        result = {'file': filename}
+        for field in fields:
+            result[field] = get_prop(lnk, field.split('.'))
+    except Exception as e:
+        result = {'file': filename, 'error': '%s: %s' % (type(e).__name__, e)}
+    return json.dumps(result, default=_json_default, ensure_ascii=False)
+
+
+def _scan_chunk(filenames, fields=SCAN_FIELDS):
+    lines = (_scan_file(filename, fields) for filename in filenames)
+    return [line for line in lines if line is not None]
+
+
+def scan(root, workers=None, fields=SCAN_FIELDS, chunksize=64):
+    """
+    Walks directory tree and parses all files with lnk signature at process pool.
+    Yields one json line per lnk file with requested dotted fields, or with error.
+    """
+    func = partial(_scan_chunk, fields=tuple(fields))
+    return _map_chunks(func, walk_files(root), workers, chunksize, ordered=False)
+
+
+# ---- parsing lnk members of zip and tar archives
+
+class ArchiveResult(NamedTuple):
+    member: str
+    lnk: Optional[Lnk]
+    error: Optional[Exception]
+
+
+def _archive_members(path):
+    # (name, size, file object) of regular members, tar is read as forward only stream
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if not info.is_dir():
+                    with archive.open(info) as f:
+                        yield info.filename, info.file_size, f
+        return
+    try:
+        archive = tarfile.open(path, 'r|*')
+    except tarfile.TarError as e:
+        raise FormatException("%s is not a zip or tar archive: %s" % (path, e))
+    with archive:
+        for info in archive:
+            if info.isfile():
+                yield info.name, info.size, archive.extractfile(info)
+
+
+def _read_into(f, view):
+    # fills the view from the file object, returns number of bytes read
+    size = 0
+    while size < len(view):
+        count = f.readinto(view[size:])
+        if not count:
+            break
+        size += count
+    return size
+
+
+def parse_archive(path):
+    """
+    Parses lnk members of zip or tar (optionally compressed) archive without extracting them.
+    Each member is read once into the reused buffer, members without lnk signature are skipped
+    after the first bytes, lnk members bigger than MAX_LNK_SIZE are reported as errors without reading.
+    Yields ArchiveResult(member, lnk, error) in the order of the archive.
+    """
+    buffer = bytearray(4096)
+    for name, size, f in _archive_members(path):
+        if size < HEADER_SIZE:
+            continue
+        view = memoryview(buffer)
+        # other members are skipped after the signature
+        if _read_into(f, view[:20]) < 20 or view[:4] != _SIGNATURE or view[4:20] != _GUID:
+            continue
+        if size > MAX_LNK_SIZE:
+            # size comes from the archive, it is not allocated for malformed members
+            yield ArchiveResult(name, None, FormatException("Size %d exceeds the limit %d" % (size, MAX_LNK_SIZE)))
+            continue
+        if size > len(buffer):
+            # the old buffer may be still referenced by views, so it is replaced rather than resized
+            buffer = bytearray(size)
+            buffer[:20] = view[:20]
+            view = memoryview(buffer)
+        data = view[:20 + _read_into(f, view[20:size])]
+        try:
+            lnk, error = Lnk.from_buffer(data), None
+        except Exception as e:
+            # traceback keeps the parsing frames with views of the reused buffer
+            e.__traceback__ = None
+            lnk, error = None, e
+        yield ArchiveResult(name, lnk, error)
+
+
+def scan_archive(path, fields=SCAN_FIELDS):
+    """Parses lnk members of zip or tar archive, yields json lines just like scan()."""
+    for result in parse_archive(path):
+        record = {'archive': path, 'file': result.member}
+        try:
+            if result.error is not None:
+                raise result.error
+            for field in fields:
+                record[field] = get_prop(result.lnk, field.split('.'))
+        except Exception as e:
+            record = {'archive': path, 'file': result.member, 'error': '%s: %s' % (type(e).__name__, e)}
+        yield json.dumps(record, default=_json_default, ensure_ascii=False)
+
+
+# ---- carving lnk files from raw data
+
+_LNK_MAGIC = re.compile(re.escape(_SIGNATURE + _GUID))
+
+
+class CarveResult(NamedTuple):
+    offset: int
+    end: Optional[int]  # None for errors
+    lnk: Optional[Lnk]
+    error: Optional[Exception]
+
+
+def _carve_view(view, start=0):
+    pos = start
+    while True:
+        match = _LNK_MAGIC.search(view, pos)
+        if match is None:
+            return
+        offset = match.start()
+        try:
+            lnk = Lnk()
+            end = lnk._parse_lnk_buffer(view, offset)
+        except Exception as e:
+            # traceback keeps the parsing frames with views of the source, which may be closed mmap
+            e.__traceback__ = None
+            yield CarveResult(offset, None, None, e)
+            pos = offset + 1
+            continue
+        yield CarveResult(offset, end, lnk, None)
+        pos = end
+
+
+def carve(source, start=0):
+    """
+    Searches lnk header signature at raw data (disk image, memory dump, etc.)
+    given by filename (memory mapped, so it isn't loaded into memory) or buffer.
+    Yields CarveResult(offset, end, lnk, error) for each found signature,
+    search continues after the end of parsed lnk or after the signature of failed one.
+    """
+    if not isinstance(source, str):
+        with as_view(source) as view:
+            yield from _carve_view(view, start)
+        return
+    with open(source, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return  # empty file can't be mapped
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            with as_view(mapped) as view:
+                yield from _carve_view(view, start)
+
+
+class LnkSpan(NamedTuple):
+    start: int
+    end: int
+    lnk: Lnk
+
+
+def iter_lnks(source, offset=0):
+    """
+    Parses consecutive lnk structures of one buffer or binary stream (read from its current position),
+    ex.: .customDestinations-ms jump lists, starting at offset.
+    Data between them (ex.: headers of jump list categories) is skipped up to the next signature.
+    Yields LnkSpan(start, end, lnk) with the byte range of each lnk, raises FormatException for broken one.
+    """
+    if hasattr(source, 'read'):
+        source = source.read()
+    for result in _carve_view(as_view(source), offset):
+        if result.error is not None:
+            raise FormatException("Broken lnk at offset %d: %s" % (result.offset, result.error))
+        yield LnkSpan(result.offset, result.end, result.lnk)
+
+
+# ---- jump lists (.automaticDestinations-ms, OLE compound files)
+
+_CFB_SIGNATURE = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+_CFB_HEADER = Struct('<8s16x2xH2xHH6x4xII4xII4xII')
+_CFB_DIFAT = Struct('<109I')
+_CFB_ENTRY = Struct('<64sHB13x16x4x16xIQ')
+_CFB_END_OF_CHAIN = 0xFFFFFFFE
+_CFB_STREAM = 2
+
+
+def _cfb_table(count):
+    return Struct('<%dI' % count)
+
+_DESTLIST_HEADER = Struct('<III')
+_DESTLIST_ENTRY = Struct('<8x16s16s32x16sI4xQi')
+
+
+class _CfbEntry(NamedTuple):
+    name: str
+    type: int
+    start: int
+    size: int
+
+
+class CompoundFile(object):
+    """
+    Minimal reader of OLE compound file (CFB) streams from buffer (bytes, bytearray, mmap or memoryview).
+    Streams are followed through FAT and mini FAT chains and returned as memoryviews,
+    not copied when the sectors of the stream are contiguous.
+    """
+
+    def __init__(self, buf):
+        view = as_view(buf)
+        (
+            signature, major_version, sector_shift, mini_sector_shift, fat_count, directory_start,
+            self._mini_cutoff, mini_fat_start, difat_start, difat_count,
+        ) = unpack_from(_CFB_HEADER, view, 0)
+        if signature != _CFB_SIGNATURE:
+            raise FormatException("This is not an OLE compound file.")
+        if not 7 <= sector_shift <= 16 or not 2 <= mini_sector_shift < sector_shift:
+            raise FormatException("Invalid sector size of compound file.")
+        self._view = view
+        self._sector_size = 1 << sector_shift
+        self._mini_sector_size = 1 << mini_sector_shift
+        self._fat = self._read_fat(fat_count, difat_start, difat_count)
+        directory = self._read_chain(directory_start)
+        entries = [self._read_entry(directory, offset) for offset in range(0, len(directory) - 127, 128)]
+        if not entries:
+            raise FormatException("Compound file without root entry.")
+        if major_version == 3:
+            # high part of the size is not used by 512 byte sectors version
+            entries = [entry._replace(size=entry.size & 0xFFFFFFFF) for entry in entries]
+        root = entries[0]
+        self._mini_stream = self._read_chain(root.start, root.size)
+        mini_fat = self._read_chain(mini_fat_start)
+        self._mini_fat = _cfb_table(len(mini_fat) // 4).unpack_from(mini_fat)
+        self.streams = OrderedDict((entry.name, entry) for entry in entries[1:] if entry.type == _CFB_STREAM)
+
+    def _sector_offset(self, sector):
+        return (sector + 1) * self._sector_size
+
+    def _read_sector_table(self, sector):
+        offset = self._sector_offset(sector)
+        check_bounds(self._view, offset, self._sector_size)
+        return _cfb_table(self._sector_size // 4).unpack_from(self._view, offset)
+
+    def _read_fat(self, fat_count, difat_start, difat_count):
+        sectors = list(unpack_from(_CFB_DIFAT, self._view, 0x4C))
+        # the last entry of each DIFAT sector is the next DIFAT sector
+        sector = difat_start
+        for _ in range(difat_count):
+            table = self._read_sector_table(sector)
+            sectors.extend(table[:-1])
+            sector = table[-1]
+        fat = []
+        for sector in sectors[:fat_count]:
+            fat.extend(self._read_sector_table(sector))
+        return fat
+
+    @staticmethod
+    def _chain(start, table):
+        sector = start
+        for _ in range(len(table)):
+            if sector == _CFB_END_OF_CHAIN:
+                return
+            if sector >= len(table):
+                raise FormatException("Invalid sector %d in compound file chain" % sector)
+            yield sector
+            sector = table[sector]
+        if sector != _CFB_END_OF_CHAIN:
+            raise FormatException("Cyclic sector chain in compound file")
+
+    @staticmethod
+    def _join(buf, sectors, sector_size, base, size):
+        # contiguous sectors are sliced from the buffer, others are copied together
+        if size is None:
+            size = len(sectors) * sector_size
+        if not sectors:
+            return memoryview(b'')[:0]
+        if size > len(sectors) * sector_size:
+            raise FormatException("Stream size %d exceeds its sectors" % size)
+        first = sectors[0]
+        if sectors == list(range(first, first + len(sectors))):
+            offset = (first + base) * sector_size
+            check_bounds(buf, offset, size)
+            return buf[offset:offset + size]
+        parts = []
+        for sector in sectors:
+            offset = (sector + base) * sector_size
+            check_bounds(buf, offset, sector_size)
+            parts.append(buf[offset:offset + sector_size])
+        return memoryview(b''.join(parts))[:size]
+
+    def _read_chain(self, start, size=None):
+        sectors = list(self._chain(start, self._fat))
+        return self._join(self._view, sectors, self._sector_size, 1, size)
+
+    @staticmethod
+    def _read_entry(buf, offset):
+        raw_name, name_size, entry_type, start, size = unpack_from(_CFB_ENTRY, buf, offset)
+        name = str(raw_name[:max(name_size - 2, 0)], 'utf-16-le', 'replace')
+        return _CfbEntry(name, entry_type, start, size)
+
+    def read_stream(self, name):
+        """Returns memoryview with content of the stream, raises KeyError for missing one."""
+        entry = self.streams[name]
+        if entry.size < self._mini_cutoff:
+            sectors = list(self._chain(entry.start, self._mini_fat))
+            return self._join(self._mini_stream, sectors, self._mini_sector_size, 0, entry.size)
+        return self._read_chain(entry.start, entry.size)
+
+
+class DestListEntry(NamedTuple):
+    entry_id: int
+    stream: str  # name of the stream with lnk of this entry
+    hostname: str
+    access_time: datetime
+    access_count: Optional[int]  # stored since Windows 10
+    pinned: bool
+    path: str
+    volume_droid: str
+    file_droid: str
+
+
+def parse_dest_list(buf):
+    """Parses DestList stream of .automaticDestinations-ms jump list, yields DestListEntry."""
+    view = as_view(buf)
+    version, count, _ = unpack_from(_DESTLIST_HEADER, view, 0)
+    offset = 32
+    for _ in range(count):
+        volume_droid, file_droid, hostname, entry_id, access_time, pin = unpack_from(_DESTLIST_ENTRY, view, offset)
+        offset += _DESTLIST_ENTRY.size
+        access_count = None
+        if version >= 3:
+            access_count = unpack_int(view, offset + 4)
+            offset += 16
+        path, offset = unpack_sized_string(view, offset)
+        if version >= 3:
+            offset += 4
+        yield DestListEntry(
+            entry_id=entry_id,
+            stream='%x' % entry_id,
+            hostname=str(hostname.split(b'\x00', 1)[0], 'ascii', 'replace'),
+            access_time=convert_time_to_unix(access_time),
+            access_count=access_count,
+            pinned=pin != -1,
+            path=path,
+            volume_droid=guid_from_bytes(volume_droid),
+            file_droid=guid_from_bytes(file_droid),
+        )
+
+
+class JumpListEntry(NamedTuple):
+    stream: str
+    lnk: Optional[Lnk]
+    error: Optional[Exception]
+    dest: Optional[DestListEntry]  # None for streams missing at DestList
+
+
+def parse_jump_list(source):
+    """
+    Parses .automaticDestinations-ms jump list (filename or buffer) without temporary files:
+    lnk of each stream is decoded from the view of the compound file.
+    Yields JumpListEntry in DestList order (most recent first) and then streams missing at DestList.
+    """
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            source = f.read()
+    cfb = CompoundFile(source)
+    dest_list = []
+    if 'DestList' in cfb.streams:
+        dest_list = list(parse_dest_list(cfb.read_stream('DestList')))
+    names = [dest.stream for dest in dest_list if dest.stream in cfb.streams]
+    names += [name for name in cfb.streams if name != 'DestList' and name not in names]
+    dests = {dest.stream: dest for dest in dest_list}
+    for name in names:
+        try:
+            lnk, error = Lnk.from_buffer(cfb.read_stream(name)), None
+        except Exception as e:
+            lnk, error = None, e
+        yield JumpListEntry(name, lnk, error, dests.get(name))
+
+
+# ---- rewriting path prefixes
+
+class RewriteResult(NamedTuple):
+    path: str
+    changed: bool
+    error: Optional[Exception]
+
+
+def _prefix_mapping(mapping):
+    # (old, new) pairs without trailing separators, longest prefixes are tried first
+    if isinstance(mapping, dict):
+        mapping = mapping.items()
+    pairs = [(old.rstrip('\\'), new.rstrip('\\')) for old, new in mapping]
+    return sorted(pairs, key=lambda pair: len(pair[0]), reverse=True)
+
+
+def _match_prefix(path, mapping):
+    # (old, new) pair of mapping matched by whole leading segments of path (case insensitive)
+    lower = path.lower()
+    for old, new in mapping:
+        if lower.startswith(old.lower()) and path[len(old):len(old) + 1] in ('', '\\'):
+            return old, new
+    return None
+
+
+def _map_path(path, mapping):
+    # path with replaced prefix, or None if no prefix matched
+    if not path:
+        return None
+    match = _match_prefix(path, mapping)
+    if match is None:
+        return None
+    old, new = match
+    result = new + path[len(old):]
+    if is_drive(result):
+        result = result.rstrip('\\') + '\\'
+    return result
+
+
+def _split_share(path):
+    # \\server\share\dir\file -> (\\server\share, dir\file)
+    parts = path.split('\\')
+    return '\\'.join(parts[:4]), '\\'.join(parts[4:])
+
+
+def _rewrite_id_list(lnk, mapping):
+    # only absolute local paths (computer, drive, path segments) are rewritten
+    id_list = lnk._section('shell_item_id_list')
+    items = id_list.items
+    if len(items) < 2 or type(items[0]) != RootEntry or items[0].root != ROOT_MY_COMPUTER:
+        return None
+    if type(items[1]) != DriveEntry or any(type(item) != PathSegmentEntry for item in items[2:]):
+        return None
+    names = [items[1].drive.decode()] + [item.full_name for item in items[2:]]
+    match = _match_prefix('\\'.join(names), mapping)
+    if match is None:
+        return None
+    old, new = match
+    replaced = items[2:1 + len(old.split('\\'))]
+    tail = items[1 + len(old.split('\\')):]
+    new_path = new + ''.join('\\' + item.full_name for item in tail)
+    if new.startswith('\\\\'):
+        # network path can't be stored at IDList, LinkInfo is used instead
+        lnk.shell_item_id_list = None
+        return new_path
+    new_names = new.split('\\')
+    id_list = lnk._mutable_section('shell_item_id_list')
+    id_list.items = [items[0], DriveEntry(new_names[0])]
+    for index, name in enumerate(new_names[1:]):
+        segment = PathSegmentEntry()
+        segment.type = TYPE_FOLDER
+        segment.file_size = 0
+        segment.short_name = segment.full_name = name
+        # times of the replaced segments (or of the header) keep the same bytes at repeated rewrites
+        if replaced:
+            # segments are matched from the end, so the target takes times of the old target
+            source = replaced[max(len(replaced) - len(new_names) + 1 + index, 0)]
+            segment.created, segment.modified, segment.accessed = source.created, source.modified, source.accessed
+        segment.fill_times(fixed_clock(lnk.modification_time))
+        id_list.items.append(segment)
+    if replaced and not tail and len(new_names) > 1:
+        # the whole target is replaced, it keeps its type (file or folder)
+        id_list.items[-1].type = replaced[-1].type
+        id_list.items[-1].file_size = replaced[-1].file_size
+    id_list.items.extend(tail)
+    return new_path
+
+
+def _set_link_info_path(link_info, path):
+    if path.startswith('\\\\'):
+        link_info.network_share_name, link_info.base_name = _split_share(path)
+        link_info.local, link_info.remote = 0, 1
+    else:
+        if not link_info.local:
+            link_info.drive_type = DRIVE_UNKNOWN
+            link_info.drive_serial = 0
+            link_info.volume_label = ''
+        link_info.local_base_path = path
+        link_info.local, link_info.remote = 1, 0
+    link_info.make_path()
+
+
+def rewrite_lnk(lnk, mapping):
+    """
+    Replaces path prefixes of lnk target (mapping of old to new prefixes, ex.: {'Z:\\': '\\\\server\\share'}).
+    Prefixes are matched case insensitive by whole path segments at the same way
+    at the IDList, LinkInfo, EnvironmentVariableDataBlock, working directory and icon location.
+    Untouched sections are kept as is. Returns True if lnk was changed.
+    """
+    mapping = _prefix_mapping(mapping)
+    changed = False
+
+    if lnk.link_flags.HasLinkInfo and not lnk.link_flags.ForceNoLinkInfo:
+        new_path = _map_path(lnk._section('link_info').path, mapping)
+        if new_path is not None:
+            _set_link_info_path(lnk._mutable_section('link_info'), new_path)
+            changed = True
+
+    if lnk.link_flags.HasLinkTargetIDList:
+        new_path = _rewrite_id_list(lnk, mapping)
+        if new_path is not None:
+            if not lnk.link_flags.HasLinkTargetIDList:
+                # target moved to network share, only LinkInfo points to it now
+                if not lnk.link_flags.HasLinkInfo or lnk.link_flags.ForceNoLinkInfo:
+                    lnk.link_info = LinkInfo()
+                _set_link_info_path(lnk._mutable_section('link_info'), new_path)
+            changed = True
+
+    extra_data = lnk._section('extra_data')
+    for block in extra_data.blocks if extra_data else ():
+        if type(block) == ExtraData_EnvironmentVariableDataBlock:
+            target = block.target_unicode.split('\x00')[0] or block.target_ansi.split('\x00')[0]
+            new_path = _map_path(target, mapping)
+            if new_path is not None:
+                if len(new_path) >= 260:
+                    raise ValueError("Path is too long for EnvironmentVariableDataBlock: %s" % new_path)
+                lnk._mutable_section('extra_data')
+                block.target_ansi = block.target_unicode = new_path
+                changed = True
+
+    for name in ('work_dir', 'icon'):
+        new_path = _map_path(getattr(lnk, name), mapping)
+        if new_path is not None:
+            setattr(lnk, name, new_path)
+            changed = True
+    return changed
+
+
+def _rewrite_file(filename, mapping, dry_run, batch=None):
+    # None for files without lnk signature
+    data = _read_lnk_file(filename)
+    if data is None:
+        return None
+    lnk = Lnk.from_buffer(data, lazy=True)
+    if not rewrite_lnk(lnk, mapping):
+        return False
+    if not dry_run:
+        write_atomic(filename, lnk.to_bytes(), batch)
+    return True
+
+
+def rewrite_file(filename, mapping, dry_run=False):
+    """
+    Replaces path prefixes of lnk file (see rewrite_lnk) and writes it atomically.
+    With dry_run=True file is not written. Returns True if lnk was (or would be) changed.
+    """
+    changed = _rewrite_file(filename, mapping, dry_run)
+    if changed is None:
+        raise FormatException("This is not a .lnk file.")
+    return changed
+
+
+def _rewrite_chunk(filenames, mapping, dry_run=False):
+    results = []
+    with SaveBatch() as batch:
+        for filename in filenames:
+            try:
+                changed = _rewrite_file(filename, mapping, dry_run, batch)
+                if changed is not None:
+                    results.append(RewriteResult(filename, changed, None))
+            except Exception as e:
+                results.append(RewriteResult(filename, False, e))
+    return results
+
+
+def rewrite(root, mapping, workers=None, dry_run=False, chunksize=64):
+    """
+    Replaces path prefixes (see rewrite_lnk) of all lnk files of directory tree at process pool.
+    Yields RewriteResult(path, changed, error) for each lnk file as soon as it processed.
+    """
+    func = partial(_rewrite_chunk, mapping=_prefix_mapping(mapping), dry_run=dry_run)
+    return _map_chunks(func, walk_files(root), workers, chunksize, ordered=False)
+
+
 def cli():
     parser = argparse.ArgumentParser(add_help=False)
-    subparsers = parser.add_subparsers(dest='action', metavar='{p, c, d}')
+    subparsers = parser.add_subparsers(dest='action', metavar='{p, c, d, s, patch, rewrite}')
     parser.add_argument('--help', '-h', action='store_true')
 
     parser_parse = subparsers.add_parser('parse', aliases=['p'], help='read lnk file')
-    parser_parse.add_argument('filename', help='lnk filename to read')
+    parser_parse.add_argument('filename', help='lnk filename to read (- for stdin)')
     parser_parse.add_argument('props', nargs='*', help='props path to read')
 
     parser_create = subparsers.add_parser('create', aliases=['c'], help='create new lnk file')
-    parser_create.add_argument('target', help='target path')
-    parser_create.add_argument('name', help='lnk filename to create')
+    parser_create.add_argument('target', nargs='?', help='target path')
+    parser_create.add_argument('name', nargs='?', help='lnk filename to create')
     parser_create.add_argument('--arguments', '-a', nargs='?', help='additional arguments')
     parser_create.add_argument('--description', '-d', nargs='?', help='description')
     parser_create.add_argument('--icon', '-i', nargs='?', help='icon filename')
     parser_create.add_argument('--icon-index', '-ii', type=int, default=0, nargs='?', help='icon index')
     parser_create.add_argument('--workdir', '-w', nargs='?', help='working directory')
     parser_create.add_argument('--mode', '-m', nargs='?', choices=['Maximized', 'Normal', 'Minimized'], help='window mode')
+    parser_create.add_argument(
+        '--from-manifest', metavar='MANIFEST', help='create lnk files from records of jsonl or csv file',
+    )
+    parser_create.add_argument('--workers', '-j', type=int, help='number of worker processes (with --from-manifest)')
+    parser_create.add_argument(
+        '--skip-identical', action='store_true', help='do not rewrite existed files with the same content',
+    )
+    parser_create.add_argument(
+        '--deterministic', action='store_true', help='use fixed times instead of current for non-existed paths',
+    )
+    parser_create.add_argument(
+        '--atomic', action='store_true', help='replace files at once via temporary files and sync them',
+    )
 
     parser_dup = subparsers.add_parser('duplicate', aliases=['d'], help='read and write lnk file')
     parser_dup.add_argument('filename', help='lnk filename to read')
     parser_dup.add_argument('new_filename', help='new filename to write')
 
+    parser_patch = subparsers.add_parser('patch', help='change strings of existed lnk files in place')
+    parser_patch.add_argument('filenames', nargs='+', help='lnk filenames to change')
+    parser_patch.add_argument('--arguments', '-a', help='additional arguments')
+    parser_patch.add_argument('--description', '-d', help='description')
+    parser_patch.add_argument('--icon', '-i', help='icon filename')
+    parser_patch.add_argument('--workdir', '-w', help='working directory')
+    parser_patch.add_argument('--relative-path', '-r', help='relative path')
+
+    parser_scan = subparsers.add_parser('scan', aliases=['s'], help='parse all lnk files of directory tree to json lines')
+    parser_scan.add_argument('root', help='directory (or archive) to scan')
+    parser_scan.add_argument('--archive', '-a', action='store_true', help='scan members of zip or tar archive')
+    parser_scan.add_argument('--workers', '-j', type=int, help='number of worker processes (not used for archives)')
+    parser_scan.add_argument('--fields', '-f', nargs='+', default=SCAN_FIELDS, help='props paths to output')
+    parser_scan.add_argument('--output', '-o', help='output filename (stdout by default)')
+
+    parser_rewrite = subparsers.add_parser('rewrite', help='replace path prefixes at all lnk files of directory tree')
+    parser_rewrite.add_argument('root', help='directory to process')
+    parser_rewrite.add_argument(
+        '--map', '-m', action='append', required=True, metavar='OLD=NEW', help='path prefix to replace',
+    )
+    parser_rewrite.add_argument('--dry-run', '-n', action='store_true', help='only report files to change')
+    parser_rewrite.add_argument('--workers', '-j', type=int, help='number of worker processes')
+
     args = parser.parse_args()
     if args.help or not args.action:
         print('''
 Tool for read or create .lnk files
 
-usage: pylnk3.py [p]arse / [c]reate ...
+usage: pylnk3.py [p]arse / [c]reate / [s]can ...
 
 Examples:
 pylnk3 p filename.lnk
+cat filename.lnk | pylnk3 p - path
 pylnk3 c c:\\prog.exe shortcut.lnk
 pylnk3 c \\\\192.168.1.1\\share\\file.doc doc.lnk
 pylnk3 create c:\\1.txt text.lnk -m Minimized -d "Description"
+pylnk3 create --from-manifest shortcuts.jsonl --workers 8
+pylnk3 scan c:\\Users --workers 8 -o links.jsonl
+pylnk3 scan evidence.tar.gz --archive -o links.jsonl
+pylnk3 patch *.lnk --workdir d:\\new
+pylnk3 rewrite c:\\Users --map Z:\\=\\\\fileserver\\share --dry-run
 
 for more info use help for each action (ex.: "pylnk3 create -h")
         '''.strip())
         exit(1)
 
-    if args.action in ['create', 'c']:
-        for_file(
-            args.target, args.name, arguments=args.arguments,
+    if args.action in ['create', 'c'] and args.from_manifest:
+        if args.target or args.name:
+            parser.error('target and name are given by manifest')
+        started = time.monotonic()
+        total = errors = written = 0
+        results = create_many(
+            read_manifest(args.from_manifest), workers=args.workers,
+            skip_if_identical=args.skip_identical, deterministic=args.deterministic, atomic=args.atomic,
+        )
+        for result in results:
+            total += 1
+            written += result.written
+            if result.error is not None:
+                errors += 1
+                print('record %d (%s): %s' % (result.index, result.name, result.error), file=sys.stderr)
+        elapsed = time.monotonic() - started
+        print('created %d of %d lnk files (%d written, %d identical skipped) in %.2f s (%.1f files/s)' % (
+            total - errors, total, written, total - errors - written, elapsed,
+            (total - errors) / elapsed if elapsed else 0,
+        ))
+        if errors:
+            exit(1)
+    elif args.action in ['create', 'c']:
+        if not args.target or not args.name:
+            parser.error('target and name are required')
+        lnk = for_file(
+            args.target, arguments=args.arguments,
             description=args.description, icon_file=args.icon,
             icon_index=args.icon_index, work_dir=args.workdir,
-            window_mode=args.mode,
+            window_mode=args.mode, deterministic=args.deterministic,
         )
+        lnk.save(args.name, skip_if_identical=args.skip_identical, atomic=args.atomic)
     elif args.action in ['parse', 'p']:
-        lnk = parse(args.filename)
         props = args.props
+        source = sys.stdin.buffer if args.filename == '-' else args.filename
+        lnk = parse(source, fields=props or None)
         if len(props) == 0:
             print(lnk)
         else:
@@ -1990,6 +4015,61 @@ for more info use help for each action (ex.: "pylnk3 create -h")
         print(lnk)
         lnk.save(new_filename)
         print('saved')
+    elif args.action == 'patch':
+        strings = {
+            'arguments': args.arguments,
+            'description': args.description,
+            'icon': args.icon,
+            'work_dir': args.workdir,
+            'relative_path': args.relative_path,
+        }
+        strings = {name: value for name, value in strings.items() if value is not None}
+        changed = errors = 0
+        for filename in args.filenames:
+            try:
+                changed += patch(filename, **strings)
+            except Exception as e:
+                errors += 1
+                print('%s: %s' % (filename, e), file=sys.stderr)
+        print('changed %d of %d files' % (changed, len(args.filenames)))
+        if errors:
+            exit(1)
+    elif args.action == 'rewrite':
+        mapping = []
+        for item in args.map:
+            old, sep, new = item.partition('=')
+            if not sep or not old:
+                parser.error('invalid --map value (expected OLD=NEW): %s' % item)
+            mapping.append((old, new))
+        started = time.monotonic()
+        total = changed = errors = 0
+        for result in rewrite(args.root, mapping, workers=args.workers, dry_run=args.dry_run):
+            total += 1
+            if result.error is not None:
+                errors += 1
+                print('%s: %s' % (result.path, result.error), file=sys.stderr)
+            elif result.changed:
+                changed += 1
+                print(result.path)
+        elapsed = time.monotonic() - started
+        print('%s %d of %d lnk files in %.2f s (%.1f files/s)' % (
+            'would rewrite' if args.dry_run else 'rewrote',
+            changed, total, elapsed, changed / elapsed if elapsed else 0,
+        ))
+        if errors:
+            exit(1)
+    elif args.action in ['s', 'scan']:
+        output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+        try:
+            if args.archive:
+                lines = scan_archive(args.root, fields=args.fields)
+            else:
+                lines = scan(args.root, workers=args.workers, fields=args.fields)
+            for line in lines:
+                output.write(line + '\n')
+        finally:
+            if args.output:
+                output.close()
 
 
 if __name__ == '__main__':
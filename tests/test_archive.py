@@ -0,0 +1,72 @@
+import os
+import tarfile
+import zipfile
+
+import pytest
+
+import pylnk3
+from pylnk3 import FormatException, Lnk, parse_archive
+
+
+def archive_members(examples_path):
+    members = {}
+    for name in sorted(os.listdir(examples_path)):
+        with open(os.path.join(examples_path, name), 'rb') as f:
+            members['links/' + name] = f.read()
+    members['links/readme.txt'] = b'not a lnk file at all'
+    members['links/broken.lnk'] = members['links/local_file.lnk'][:100]
+    # bigger than the initial buffer
+    members['links/padded.lnk'] = members['links/local_file.lnk'].ljust(10000, b'\x00')
+    return members
+
+
+def make_zip(filename, members):
+    with zipfile.ZipFile(filename, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('links/', b'')
+        for name, data in members.items():
+            archive.writestr(name, data)
+
+
+def make_tar(filename, members):
+    with tarfile.open(filename, 'w:gz') as archive:
+        for name, data in members.items():
+            with open(os.path.join(os.path.dirname(filename), 'member'), 'wb') as f:
+                f.write(data)
+            archive.add(os.path.join(os.path.dirname(filename), 'member'), arcname=name)
+
+
+@pytest.mark.parametrize('make_archive, name', ((make_zip, 'links.zip'), (make_tar, 'links.tar.gz')))
+def test_parse_archive(examples_path, tmp_path, make_archive, name):
+    members = archive_members(examples_path)
+    filename = str(tmp_path / name)
+    make_archive(filename, members)
+    results = {result.member: result for result in parse_archive(filename)}
+    assert 'links/readme.txt' not in results
+    assert set(results) == set(members) - {'links/readme.txt'}
+    for member, result in results.items():
+        if member == 'links/broken.lnk':
+            assert result.lnk is None
+            assert isinstance(result.error, FormatException)
+            continue
+        assert result.error is None
+        # both are parsed without passthrough of raw sections
+        expected = Lnk.from_buffer(bytearray(members[member]))
+        assert result.lnk.to_bytes() == expected.to_bytes()
+    assert results['links/padded.lnk'].lnk.path == 'C:\\Windows\\explorer.exe'
+
+
+def test_parse_archive_invalid(tmp_path):
+    filename = tmp_path / 'file.bin'
+    filename.write_bytes(b'not an archive' * 100)
+    with pytest.raises(FormatException):
+        list(parse_archive(str(filename)))
+
+
+def test_parse_archive_size_limit(examples_path, tmp_path, monkeypatch):
+    members = archive_members(examples_path)
+    filename = str(tmp_path / 'links.tar.gz')
+    make_tar(filename, members)
+    monkeypatch.setattr(pylnk3, 'MAX_LNK_SIZE', 5000)
+    results = {result.member: result for result in parse_archive(filename)}
+    assert isinstance(results['links/padded.lnk'].error, FormatException)
+    assert results['links/local_file.lnk'].lnk.path == 'C:\\Windows\\explorer.exe'
@@ -0,0 +1,178 @@
+import io
+import mmap
+import os
+from io import BytesIO
+
+import pytest
+
+from pylnk3 import (
+    HEADER_SIZE, FormatException, Lnk, convert_time_to_unix, parse, peek, read_lnk_stream, unpack_header,
+)
+
+
+@pytest.mark.parametrize('wrap', (bytes, bytearray, memoryview))
+def test_from_buffer(examples_path, wrap):
+    filename = os.path.join(examples_path, 'local_file.lnk')
+    with open(filename, 'rb') as f:
+        data = f.read()
+    lnk = Lnk.from_buffer(wrap(data))
+    assert lnk.path == 'C:\\Windows\\explorer.exe'
+    assert str(lnk) == str(Lnk(filename))
+
+
+def test_from_buffer_mmap(examples_path):
+    filename = os.path.join(examples_path, 'net_folder1_file1.lnk')
+    with open(filename, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            lnk = Lnk.from_buffer(mapped)
+    # parsed values must not hold references to the closed map
+    assert lnk.path == '\\\\192.168.138.2\\STORAGE\\Downloads\\folder1\\file1.txt'
+
+
+def test_unpack_header(examples_path):
+    filename = os.path.join(examples_path, 'local_file.lnk')
+    with open(filename, 'rb') as f:
+        data = f.read()
+    header = unpack_header(data)
+    lnk = Lnk(filename)
+    assert header.link_flags == lnk.link_flags.bytes
+    assert header.file_flags == lnk.file_flags.bytes
+    assert header.file_size == lnk.file_size
+    assert convert_time_to_unix(header.modification_time) == lnk.modification_time
+
+
+def test_unpack_header_signature():
+    with pytest.raises(FormatException):
+        unpack_header(b'\x00' * HEADER_SIZE)
+    with pytest.raises(FormatException):
+        unpack_header(b'L\x00\x00\x00')
+
+
+def test_lazy(examples_path):
+    filename = os.path.join(examples_path, 'mounted_folder1_file1.lnk')
+    lnk = Lnk(filename, lazy=True)
+    assert lnk.modification_time == Lnk(filename).modification_time
+    assert 'link_info' in lnk._lazy_sections
+    assert lnk.link_info.path == '\\\\192.168.138.2\\storage\\Downloads\\folder1\\file1.txt'
+    assert 'link_info' not in lnk._lazy_sections
+    assert str(lnk) == str(Lnk(filename))
+    assert lnk._lazy_buffer is None
+
+
+def test_lazy_unicode_changed(examples_path):
+    filename = os.path.join(examples_path, 'local_file.lnk')
+    lnk = Lnk(filename, lazy=True)
+    lnk.link_flags.IsUnicode = False
+    # pending strings are decoded as they were written
+    assert lnk.relative_path == Lnk(filename).relative_path
+
+
+def test_peek(examples_path):
+    filename = os.path.join(examples_path, 'local_file.lnk')
+    header = peek(filename)
+    with open(filename, 'rb') as f:
+        assert peek(f) == header
+    lnk = Lnk(filename)
+    assert header.link_flags == lnk.link_flags.bytes
+    assert header.icon_index == lnk.icon_index
+
+
+def test_parse_fields(examples_path):
+    filename = os.path.join(examples_path, 'local_file.lnk')
+    lnk = parse(filename, fields=['path', 'creation_time'])
+    # full local path at the IDList, LinkInfo and ExtraData are not needed
+    assert 'shell_item_id_list' not in lnk._lazy_sections
+    assert 'link_info' in lnk._lazy_sections
+    assert 'extra_data' in lnk._lazy_sections
+    assert lnk.path == 'C:\\Windows\\explorer.exe'
+    assert str(lnk) == str(Lnk(filename))
+
+
+def test_to_bytes(examples_path, tmp_path):
+    filename = os.path.join(examples_path, 'local_file.lnk')
+    lnk = Lnk(filename)
+    data = lnk.to_bytes()
+    saved = str(tmp_path / 'temp.lnk')
+    lnk.save(saved)
+    with open(saved, 'rb') as f:
+        assert f.read() == data
+    # timestamps are kept exactly
+    assert unpack_header(data) == peek(filename)
+    assert str(Lnk.from_buffer(data)) == str(lnk)
+
+
+@pytest.mark.parametrize('filename', ('local_file.lnk', 'net_folder1_file1.lnk', 'recent1.lnk', 'uwp_calc.lnk'))
+@pytest.mark.parametrize('lazy', (False, True))
+def test_unmodified_passthrough(examples_path, filename, lazy):
+    filename = os.path.join(examples_path, filename)
+    with open(filename, 'rb') as f:
+        data = f.read()
+    assert Lnk(filename, lazy=lazy).to_bytes() == data
+
+
+@pytest.mark.parametrize('lazy', (False, True))
+def test_modified_sections(examples_path, lazy):
+    filename = os.path.join(examples_path, 'local_file.lnk')
+    lnk = Lnk(filename, lazy=lazy)
+    lnk.arguments = '--new'
+    # changed in place, not by setter
+    lnk.link_info.local_base_path = 'Y:\\file.txt'
+    lnk2 = Lnk.from_buffer(lnk.to_bytes())
+    assert lnk2.arguments == '--new'
+    assert lnk2.link_info.local_base_path == 'Y:\\file.txt'
+    assert lnk2.relative_path == lnk.relative_path
+    assert str(lnk2.shell_item_id_list) == str(lnk.shell_item_id_list)
+
+
+@pytest.mark.parametrize('lazy', (False, True))
+def test_modified_unicode_flag(examples_path, lazy):
+    filename = os.path.join(examples_path, 'local_file.lnk')
+    with open(filename, 'rb') as f:
+        lnk = Lnk.from_buffer(f.read(), lazy=lazy)
+    lnk.link_flags.IsUnicode = False
+    # unchanged strings are encoded again with the new flag
+    lnk2 = Lnk.from_buffer(lnk.to_bytes())
+    assert lnk2.relative_path == b'..\\..\\..\\..\\Windows\\explorer.exe'
+    assert lnk2.work_dir == b'C:\\Windows'
+
+
+class NonSeekable(io.RawIOBase):
+    # returns at most 7 bytes per read, just like a slow pipe
+    def __init__(self, data):
+        self._data = BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        chunk = self._data.read(min(len(b), 7))
+        b[:len(chunk)] = chunk
+        return len(chunk)
+
+
+@pytest.mark.parametrize('filename', ('local_file.lnk', 'net_folder1_file1.lnk', 'uwp_calc.lnk'))
+def test_read_lnk_stream(examples_path, filename):
+    with open(os.path.join(examples_path, filename), 'rb') as f:
+        data = f.read()
+    stream = NonSeekable(data + data + b'trailing')
+    # exactly one lnk is read each time
+    assert read_lnk_stream(stream) == data
+    assert read_lnk_stream(stream) == data
+    assert stream.read() == b'trailing'
+    with pytest.raises(FormatException):
+        read_lnk_stream(NonSeekable(data[:-10]))
+
+
+def test_parse_pipe(examples_path):
+    with open(os.path.join(examples_path, 'net_folder1_file1.lnk'), 'rb') as f:
+        data = f.read()
+    read_fd, write_fd = os.pipe()
+    with open(read_fd, 'rb') as pipe:
+        with open(write_fd, 'wb') as writer:
+            writer.write(data)
+        assert not pipe.seekable()
+        lnk = Lnk(pipe)
+    assert lnk.path == '\\\\192.168.138.2\\STORAGE\\Downloads\\folder1\\file1.txt'
+    assert lnk.to_bytes() == data
+    lnk = parse(NonSeekable(data), fields=['path'])
+    assert lnk.path == '\\\\192.168.138.2\\STORAGE\\Downloads\\folder1\\file1.txt'
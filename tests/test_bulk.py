@@ -0,0 +1,66 @@
+import os
+import pickle
+
+import pytest
+
+from pylnk3 import FormatException, Lnk, LnkRecord, create_many, parse_many, peek, read_manifest
+
+
+@pytest.mark.parametrize('ordered', (True, False))
+def test_parse_many(examples_path, ordered):
+    filenames = sorted(os.listdir(examples_path))
+    paths = [os.path.join(examples_path, filename) for filename in filenames]
+    paths.append(os.path.join(examples_path, 'missing.lnk'))
+    results = list(parse_many(paths, workers=2, chunksize=3, ordered=ordered))
+    if ordered:
+        assert [result.path for result in results] == paths
+    results = {result.path: result for result in results}
+    assert len(results) == len(paths)
+    missing = results.pop(paths[-1])
+    assert missing.lnk is None
+    assert isinstance(missing.error, OSError)
+    for path, result in results.items():
+        assert result.error is None
+        assert str(result.lnk.link_info) == str(Lnk(path).link_info)
+
+
+def test_lnk_record(examples_path):
+    filename = os.path.join(examples_path, 'local_file.lnk')
+    lnk = Lnk(filename)
+    record = LnkRecord.from_lnk(lnk)
+    assert record.path == lnk.path
+    assert record.header == peek(filename)
+    assert pickle.loads(pickle.dumps(record)) == record
+    lnk.icon_index = 5
+    assert LnkRecord.from_lnk(lnk).icon_index == 5
+
+
+def test_parse_many_records(examples_path):
+    path = os.path.join(examples_path, 'local_file.lnk')
+    [result] = parse_many([path], workers=1, records=True)
+    assert result.lnk == LnkRecord.from_lnk(Lnk(path))
+
+
+def test_create_many(tmp_path):
+    records = [
+        {'target': 'C:\\dir\\app%d.exe' % i, 'name': str(tmp_path / ('app%d.lnk' % i)), 'arguments': str(i)}
+        for i in range(10)
+    ]
+    records.append({'target': 'C:\\dir\\app.exe'})
+    results = sorted(create_many(records, workers=2, chunksize=3))
+    assert [result.index for result in results] == list(range(1, 12))
+    assert [result for result in results if result.error is not None] == [results[-1]]
+    lnk = Lnk(str(tmp_path / 'app3.lnk'))
+    assert lnk.path == 'C:\\dir\\app3.exe'
+    assert lnk.arguments == '3'
+
+
+def test_read_manifest(tmp_path):
+    manifest = tmp_path / 'manifest.csv'
+    manifest.write_text('target,name,icon_index,arguments\nC:\\app.exe,app.lnk,2,\n')
+    assert list(read_manifest(str(manifest))) == [{'target': 'C:\\app.exe', 'name': 'app.lnk', 'icon_index': '2'}]
+    manifest = tmp_path / 'manifest.jsonl'
+    manifest.write_text('{"target": "C:\\\\app.exe", "name": "app.lnk"}\n\nnot json\n')
+    records = list(read_manifest(str(manifest)))
+    assert records[0] == {'target': 'C:\\app.exe', 'name': 'app.lnk'}
+    assert isinstance(records[1], FormatException)
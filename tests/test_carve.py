@@ -0,0 +1,59 @@
+import io
+import os
+
+import pytest
+
+from pylnk3 import _GUID, _SIGNATURE, FormatException, carve, iter_lnks
+
+
+def make_image(examples_path, filenames):
+    image = bytearray(b'\xff' * 100)
+    offsets = []
+    for filename in filenames:
+        offsets.append(len(image))
+        with open(os.path.join(examples_path, filename), 'rb') as f:
+            image += f.read()
+        image += b'\x00' * 37
+    return image, offsets
+
+
+def test_carve_buffer(examples_path):
+    image, offsets = make_image(examples_path, ['local_file.lnk', 'recent1.lnk', 'net_folder1_file1.lnk'])
+    # truncated lnk at the end
+    image += _SIGNATURE + _GUID + b'\x00' * 8
+    results = list(carve(image))
+    assert [result.offset for result in results] == offsets + [len(image) - 28]
+    assert results[0].lnk.path == 'C:\\Windows\\explorer.exe'
+    assert results[0].end - results[0].offset == os.path.getsize(os.path.join(examples_path, 'local_file.lnk'))
+    assert isinstance(results[-1].error, FormatException)
+
+
+def test_carve_file(examples_path, tmp_path):
+    image, offsets = make_image(examples_path, sorted(os.listdir(examples_path)))
+    filename = tmp_path / 'image.bin'
+    filename.write_bytes(image)
+    results = [result for result in carve(str(filename)) if result.lnk is not None]
+    assert [result.offset for result in results] == offsets
+    # parsed lnk doesn't depend on the closed map
+    assert results[2].lnk.path == 'C:\\Windows\\explorer.exe'
+    # stopped early
+    for result in carve(str(filename), start=offsets[1]):
+        assert result.offset == offsets[1]
+        break
+    (tmp_path / 'empty.bin').write_bytes(b'')
+    assert list(carve(str(tmp_path / 'empty.bin'))) == []
+
+
+def test_iter_lnks(examples_path):
+    filenames = ['local_file.lnk', 'recent1.lnk', 'uwp_calc.lnk']
+    jump_list, offsets = make_image(examples_path, filenames)
+    for stream in (False, True):
+        source = io.BytesIO(jump_list) if stream else bytes(jump_list)
+        spans = list(iter_lnks(source))
+        assert [span.start for span in spans] == offsets
+        for span in spans:
+            assert span.lnk.to_bytes() == jump_list[span.start:span.end]
+    spans = list(iter_lnks(jump_list, offset=offsets[1]))
+    assert [span.start for span in spans] == offsets[1:]
+    with pytest.raises(FormatException):
+        list(iter_lnks(jump_list + _SIGNATURE + _GUID))
@@ -1,6 +1,9 @@
+import json
 import os
+import shutil
 import subprocess
 import sys
+import zipfile
 from typing import Optional
 
 from pylnk3 import Lnk
@@ -40,3 +43,63 @@ def test_cli_parse(examples_path):
     path = os.path.join(examples_path, 'local_file.lnk')
     output = call_cli(f'p {path}')
     assert 'Path: C:\\Windows\\explorer.exe' in output
+
+
+def test_cli_scan(examples_path):
+    output = call_cli(f'scan {examples_path} --workers 2 --fields path arguments')
+    records = {}
+    for line in output.splitlines():
+        record = json.loads(line)
+        records[os.path.basename(record['file'])] = record
+    assert len(records) == len(os.listdir(examples_path))
+    assert records['local_file.lnk']['path'] == 'C:\\Windows\\explorer.exe'
+    assert 'arguments' in records['local_file.lnk']
+
+
+def test_cli_patch(examples_path, tmp_path):
+    filename = str(tmp_path / 'temp.lnk')
+    shutil.copy(os.path.join(examples_path, 'local_file.lnk'), filename)
+    work_dir = quote_cmd('D:\\new')
+    output = call_cli(f'patch {filename} -w {work_dir}')
+    assert 'changed 1 of 1' in output
+    assert Lnk(filename).work_dir == 'D:\\new'
+
+
+def test_cli_rewrite(examples_path, tmp_path):
+    shutil.copy(os.path.join(examples_path, 'local_file.lnk'), tmp_path)
+    mapping = quote_cmd('C:\\Windows=D:\\Windows')
+    output = call_cli(f'rewrite {tmp_path} --map {mapping}')
+    assert 'rewrote 1 of 1 lnk files' in output
+    assert Lnk(str(tmp_path / 'local_file.lnk')).path == 'D:\\Windows\\explorer.exe'
+
+
+def test_cli_create_manifest(tmp_path):
+    manifest = tmp_path / 'manifest.jsonl'
+    records = [{'target': 'C:\\dir\\file%d.txt' % i, 'name': str(tmp_path / ('%d.lnk' % i))} for i in range(3)]
+    manifest.write_text(''.join(json.dumps(record) + '\n' for record in records))
+    output = call_cli(f'create --from-manifest {manifest} --workers 2')
+    assert 'created 3 of 3 lnk files' in output
+    assert Lnk(str(tmp_path / '2.lnk')).path == 'C:\\dir\\file2.txt'
+
+
+def test_cli_scan_archive(examples_path, tmp_path):
+    filename = tmp_path / 'links.zip'
+    with zipfile.ZipFile(filename, 'w') as archive:
+        archive.write(os.path.join(examples_path, 'local_file.lnk'), 'links/local_file.lnk')
+        archive.writestr('links/readme.txt', 'text')
+    output = call_cli(f'scan {filename} --archive --fields path')
+    records = [json.loads(line) for line in output.splitlines()]
+    assert records == [{'archive': str(filename), 'file': 'links/local_file.lnk', 'path': 'C:\\Windows\\explorer.exe'}]
+
+
+def test_cli_parse_stdin(examples_path):
+    filename = os.path.join(examples_path, 'local_file.lnk')
+    # piped, so stdin is not seekable
+    cat = 'type' if sys.platform == 'win32' else 'cat'
+    exec_path = 'pylnk3.py'
+    result = subprocess.run(
+        f'{cat} {filename} | python {exec_path} p - path', check=True, shell=True,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+    )
+    output = result.stdout.decode()
+    assert output.strip() == 'C:\\Windows\\explorer.exe'
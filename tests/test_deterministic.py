@@ -0,0 +1,41 @@
+from datetime import datetime, timezone
+
+from pylnk3 import TYPE_FILE, TYPE_FOLDER, Lnk, build_uwp, fixed_clock, for_file, from_segment_list, no_filesystem
+
+
+def test_for_file_deterministic():
+    data = for_file('C:\\missing\\app.exe', arguments='--x', deterministic=True).to_bytes()
+    assert for_file('C:\\missing\\app.exe', arguments='--x', deterministic=True).to_bytes() == data
+    lnk = Lnk.from_buffer(data)
+    assert lnk.shell_item_id_list.items[-1].modified == datetime(1980, 1, 1)
+
+
+def test_fixed_clock():
+    moment = datetime(2022, 2, 3, 4, 5, 6, tzinfo=timezone.utc)
+    lnk = Lnk.from_buffer(for_file('C:\\missing\\app.exe', clock=fixed_clock(moment)).to_bytes())
+    assert lnk.creation_time == moment.astimezone().replace(tzinfo=None)
+    assert lnk.shell_item_id_list.items[-1].created == datetime(2022, 2, 3, 4, 5, 6)
+
+
+def test_builders_deterministic():
+    for build in (
+        lambda: from_segment_list(['C:', 'dir', 'file.txt'], metadata=no_filesystem, deterministic=True),
+        lambda: build_uwp('Package_8wekyb3d8bbwe', 'Package_8wekyb3d8bbwe!App', deterministic=True),
+        lambda: Lnk(deterministic=True),
+    ):
+        assert build().to_bytes() == build().to_bytes()
+
+
+def test_segment_times_deterministic():
+    segments = [
+        {'type': TYPE_FOLDER, 'name': 'dir', 'created': None, 'modified': None, 'accessed': None},
+        {'type': TYPE_FILE, 'size': 10, 'name': 'file.txt'},
+    ]
+    data = from_segment_list(['C:'] + segments, deterministic=True).to_bytes()
+    assert from_segment_list(['C:'] + segments, deterministic=True).to_bytes() == data
+    items = Lnk.from_buffer(data).shell_item_id_list.items
+    assert items[-2].created == items[-1].accessed == datetime(1980, 1, 1)
+    # missing times of segments are taken from the clock
+    moment = datetime(2022, 2, 3, 4, 5, 6)
+    lnk = Lnk.from_buffer(from_segment_list(['C:'] + segments, clock=fixed_clock(moment)).to_bytes())
+    assert lnk.shell_item_id_list.items[-1].modified == moment
@@ -0,0 +1,151 @@
+import os
+from struct import pack
+
+import pytest
+
+from pylnk3 import CompoundFile, FormatException, convert_time_to_windows, parse_dest_list, parse_jump_list
+
+SECTOR = 512
+MINI_SECTOR = 64
+END_OF_CHAIN = 0xFFFFFFFE
+FAT_SECTOR = 0xFFFFFFFD
+FREE = 0xFFFFFFFF
+
+
+def make_compound_file(streams, reverse=False):
+    # version 3 compound file, big streams are stored at reversed sectors with reverse=True
+    sectors = []
+    fat = []
+
+    def add_chain(data, reverse=False):
+        count = -(-len(data) // SECTOR)
+        start = len(sectors)
+        order = list(reversed(range(count))) if reverse else list(range(count))
+        chunks = [data[i * SECTOR:(i + 1) * SECTOR].ljust(SECTOR, b'\x00') for i in range(count)]
+        placed = [None] * count
+        for chunk, position in zip(chunks, order):
+            placed[position] = chunk
+        sectors.extend(placed)
+        fat.extend([FREE] * count)
+        for i, position in enumerate(order):
+            fat[start + position] = start + order[i + 1] if i + 1 < count else END_OF_CHAIN
+        return start + order[0] if count else END_OF_CHAIN
+
+    mini_stream = b''
+    mini_fat = []
+    entries = []
+    for name, data in streams.items():
+        if len(data) < 4096:
+            count = -(-len(data) // MINI_SECTOR)
+            start = len(mini_fat) if count else END_OF_CHAIN
+            mini_fat.extend(range(len(mini_fat) + 1, len(mini_fat) + count + 1))
+            if count:
+                mini_fat[-1] = END_OF_CHAIN
+            mini_stream += data.ljust(count * MINI_SECTOR, b'\x00')
+        else:
+            start = add_chain(data, reverse)
+        entries.append((name, 2, start, len(data)))
+    mini_stream_start = add_chain(mini_stream)
+    mini_fat_start = add_chain(b''.join(pack('<I', value) for value in mini_fat))
+    entries.insert(0, ('Root Entry', 5, mini_stream_start, len(mini_stream)))
+    directory = b''
+    for index, (name, entry_type, start, size) in enumerate(entries):
+        raw_name = (name + '\x00').encode('utf-16-le')
+        child = 1 if index == 0 and len(entries) > 1 else FREE
+        right = index + 1 if 0 < index < len(entries) - 1 else FREE
+        directory += pack(
+            '<64sHBBIII16sIQQIQ', raw_name, len(raw_name), entry_type, 1, FREE, right, child,
+            b'\x00' * 16, 0, 0, 0, start, size,
+        )
+    directory_start = add_chain(directory)
+    fat_count = -(-(len(sectors) + 1) // (SECTOR // 4))
+    fat_start = len(sectors)
+    fat.extend([FAT_SECTOR] * fat_count)
+    fat.extend([FREE] * (fat_count * SECTOR // 4 - len(fat)))
+    difat = list(range(fat_start, fat_start + fat_count)) + [FREE] * (109 - fat_count)
+    header = pack(
+        '<8s16sHHHHH6sIIIIIIIII109I', b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', b'\x00' * 16, 0x3E, 3, 0xFFFE, 9, 6,
+        b'\x00' * 6, 0, fat_count, directory_start, 0, 4096, mini_fat_start, len(mini_fat) and 1, END_OF_CHAIN, 0,
+        *difat,
+    ).ljust(SECTOR, b'\x00')
+    fat_data = b''.join(pack('<I', value) for value in fat)
+    return header + b''.join(sectors) + fat_data
+
+
+def make_dest_list(entries, version=4):
+    data = pack('<IIIfIIQ', version, len(entries), 1, 0, len(entries), 0, 1)
+    for entry_id, access_time, access_count, pinned, path in entries:
+        raw_path = path.encode('utf-16-le')
+        data += b'\x00' * 8 + bytes(range(16)) + bytes(range(16, 32)) + b'\x00' * 32
+        data += b'host'.ljust(16, b'\x00') + pack('<IfQi', entry_id, 0, access_time, 0 if pinned else -1)
+        if version >= 3:
+            data += pack('<iIQ', -1, access_count, 0)
+        data += pack('<H', len(path)) + raw_path
+        if version >= 3:
+            data += b'\x00' * 4
+    return data
+
+
+@pytest.fixture()
+def lnk_data(examples_path):
+    with open(os.path.join(examples_path, 'local_file.lnk'), 'rb') as f:
+        local = f.read()
+    with open(os.path.join(examples_path, 'net_folder1_file1.lnk'), 'rb') as f:
+        net = f.read()
+    return local, net
+
+
+@pytest.mark.parametrize('reverse', (False, True))
+def test_compound_file(lnk_data, reverse):
+    small, big = lnk_data[0], lnk_data[1].ljust(5000, b'\x00')
+    data = make_compound_file({'1': small, '2': big}, reverse=reverse)
+    cfb = CompoundFile(data)
+    assert list(cfb.streams) == ['1', '2']
+    assert bytes(cfb.read_stream('1')) == small
+    assert bytes(cfb.read_stream('2')) == big
+    # contiguous streams are not copied
+    assert (cfb.read_stream('2').obj is data) != reverse
+    with pytest.raises(KeyError):
+        cfb.read_stream('3')
+    with pytest.raises(FormatException):
+        CompoundFile(b'\x00' * SECTOR)
+
+
+def test_compound_file_cyclic_chain(lnk_data):
+    data = bytearray(make_compound_file({'1': lnk_data[0].ljust(5000, b'\x00')}))
+    # first sector of the big stream points to itself
+    data[-SECTOR:-SECTOR + 4] = pack('<I', 0)
+    with pytest.raises(FormatException):
+        CompoundFile(bytes(data)).read_stream('1')
+
+
+@pytest.mark.parametrize('version', (1, 4))
+def test_parse_dest_list(version):
+    access_time = convert_time_to_windows(1500000000)
+    data = make_dest_list([(10, access_time, 7, True, 'C:\\file.txt'), (2, access_time, 3, False, 'D:\\')], version)
+    entries = list(parse_dest_list(data))
+    assert [entry.stream for entry in entries] == ['a', '2']
+    assert entries[0].path == 'C:\\file.txt'
+    assert entries[0].hostname == 'host'
+    assert entries[0].pinned and not entries[1].pinned
+    assert entries[0].access_time.timestamp() == pytest.approx(1500000000)
+    assert entries[0].access_count == (7 if version >= 3 else None)
+    assert entries[0].volume_droid == '{03020100-0504-0706-0809-0A0B0C0D0E0F}'
+
+
+def test_parse_jump_list(lnk_data, tmp_path):
+    local, net = lnk_data
+    access_time = convert_time_to_windows(1500000000)
+    dest_list = make_dest_list([(2, access_time, 5, False, 'net'), (1, access_time, 9, True, 'local')])
+    data = make_compound_file({'1': local, '2': net, 'DestList': dest_list, '3': b'broken'})
+    filename = tmp_path / '5f7b5f1e01b83767.automaticDestinations-ms'
+    filename.write_bytes(data)
+    for source in (str(filename), data):
+        entries = list(parse_jump_list(source))
+        assert [entry.stream for entry in entries] == ['2', '1', '3']
+        assert entries[0].lnk.path == '\\\\192.168.138.2\\STORAGE\\Downloads\\folder1\\file1.txt'
+        assert entries[0].dest.access_count == 5
+        assert entries[1].lnk.path == 'C:\\Windows\\explorer.exe'
+        assert entries[1].dest.pinned
+        assert entries[2].lnk is None and entries[2].dest is None
+        assert isinstance(entries[2].error, FormatException)
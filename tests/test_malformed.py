@@ -0,0 +1,99 @@
+import os
+import time
+import tracemalloc
+from io import BytesIO
+
+import pytest
+
+import pylnk3
+from pylnk3 import ExtraData, FormatException, Lnk, read_cstring, read_cunicode, unpack_cstring
+
+
+class Stream:
+    # binary stream without getbuffer()
+    def __init__(self, data):
+        self._buf = BytesIO(data)
+
+    def read(self, size=-1):
+        return self._buf.read(size)
+
+
+@pytest.mark.parametrize('wrap', (BytesIO, Stream))
+def test_read_strings(wrap):
+    buf = wrap(b'abc\x00' + 'юникод'.encode('utf-16-le') + b'\x00\x00')
+    assert read_cstring(buf) == 'abc'
+    assert read_cunicode(buf) == 'юникод'
+    with pytest.raises(FormatException):
+        read_cstring(buf)
+
+
+@pytest.mark.parametrize('wrap', (BytesIO, Stream))
+def test_read_string_limit(monkeypatch, wrap):
+    monkeypatch.setattr(pylnk3, 'MAX_STRING_SIZE', 100)
+    with pytest.raises(FormatException):
+        read_cstring(wrap(b'a' * 1000 + b'\x00'))
+    with pytest.raises(FormatException):
+        unpack_cstring(b'a' * 1000 + b'\x00', 0)
+    assert unpack_cstring(b'a' * 100 + b'\x00', 0) == ('a' * 100, 101)
+
+
+def _local_file(examples_path):
+    with open(os.path.join(examples_path, 'local_file.lnk'), 'rb') as f:
+        return f.read()
+
+
+def test_truncated(examples_path):
+    data = _local_file(examples_path)
+    for size in (10, 80, 200, len(data) - 10):
+        with pytest.raises(FormatException):
+            Lnk.from_buffer(data[:size])
+
+
+def test_huge_extra_data_block(examples_path):
+    lnk = Lnk.from_buffer(_local_file(examples_path))
+    out = BytesIO()
+    lnk.extra_data = None
+    lnk.write(out)
+    # replace TerminalBlock by block of 4 GB
+    data = out.getvalue()[:-4] + b'\xf0\xff\xff\xff\x09\x00\x00\xa0'
+    start = time.monotonic()
+    with pytest.raises(FormatException):
+        Lnk.from_buffer(data)
+    with pytest.raises(FormatException):
+        Lnk(BytesIO(data))
+    assert time.monotonic() - start < 1
+    with pytest.raises(FormatException):
+        ExtraData(BytesIO(b'\xf0\xff\xff\xff\x09\x00\x00\xa0'))
+
+
+class CountingStream(BytesIO):
+    def __init__(self, data):
+        super().__init__(data)
+        self.read_size = 0
+
+    def read(self, size=-1):
+        data = super().read(size)
+        self.read_size += len(data)
+        return data
+
+
+def test_big_file_not_loaded(examples_path, tmp_path):
+    stream = CountingStream(b'\x00' * 0x100000)
+    with pytest.raises(FormatException):
+        Lnk(stream)
+    assert stream.read_size <= pylnk3.HEADER_SIZE
+    # trailing data of lnk is not read either
+    data = _local_file(examples_path)
+    stream = CountingStream(data + b'\x00' * 0x100000)
+    Lnk(stream)
+    assert stream.read_size == len(data)
+    filename = tmp_path / 'big.bin'
+    with open(filename, 'wb') as f:
+        f.truncate(200 * 0x100000)
+    tracemalloc.start()
+    try:
+        with pytest.raises(FormatException):
+            Lnk(str(filename))
+        assert tracemalloc.get_traced_memory()[1] < 0x100000
+    finally:
+        tracemalloc.stop()
@@ -0,0 +1,59 @@
+import io
+import os
+from datetime import datetime
+
+from pylnk3 import (
+    TYPE_FILE, TYPE_FOLDER, Lnk, MetadataInventory, PathMetadata, for_file, from_segment_list,
+    no_filesystem,
+)
+
+
+def forbid_filesystem(monkeypatch):
+    def forbidden(path, *args, **kwargs):
+        raise AssertionError('filesystem is used for %s' % path)
+
+    monkeypatch.setattr(os, 'stat', forbidden)
+    monkeypatch.setattr(os.path, 'isdir', forbidden)
+
+
+def test_for_file_inventory(monkeypatch):
+    modified = datetime(2020, 5, 17, 10, 30, 20)
+    inventory = MetadataInventory({
+        'C:\\Program Files\\App\\app.exe': PathMetadata(TYPE_FILE, 1234, modified, modified, modified),
+    })
+    lookups = []
+    lookup = inventory.lookup
+    monkeypatch.setattr(inventory, 'lookup', lambda paths: lookups.append(paths) or lookup(paths))
+    lnk = for_file('c:\\program files\\app\\APP.EXE', metadata=inventory)
+    # one batch lookup for all segments
+    assert lookups == [['c:\\program files', 'c:\\program files\\app', 'c:\\program files\\app\\APP.EXE']]
+    assert lnk.file_size == 1234
+    assert lnk.modification_time == modified
+    segments = lnk.shell_item_id_list.items[2:]
+    assert [segment.type for segment in segments] == [TYPE_FOLDER, TYPE_FOLDER, TYPE_FILE]
+    assert segments[-1].modified == modified
+
+
+def test_no_filesystem(monkeypatch):
+    lnk1 = for_file('C:\\dir\\file.txt', metadata=no_filesystem)
+    forbid_filesystem(monkeypatch)
+    lnk2 = for_file('C:\\dir\\file.txt', metadata=no_filesystem)
+    # deterministic segments
+    assert lnk1.shell_item_id_list.bytes == lnk2.shell_item_id_list.bytes
+
+
+def test_from_segment_list_metadata(monkeypatch):
+    forbid_filesystem(monkeypatch)
+    manifest = io.StringIO(
+        'path,type,size,modified\n'
+        'C:\\dir,folder,,\n'
+        'C:\\dir\\file.txt,file,42,2021-01-02T03:04:06\n'
+    )
+    inventory = MetadataInventory.from_csv(manifest)
+    assert len(inventory) == 2
+    lnk = from_segment_list(['C:', 'dir', {'name': 'file.txt', 'size': 7}], metadata=inventory)
+    lnk = Lnk.from_buffer(lnk.to_bytes())
+    assert lnk.path == 'C:\\dir\\file.txt'
+    segment = lnk.shell_item_id_list.items[-1]
+    assert segment.file_size == 7
+    assert segment.modified == datetime(2021, 1, 2, 3, 4, 6)
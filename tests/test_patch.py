@@ -0,0 +1,32 @@
+import os
+import shutil
+
+import pytest
+
+from pylnk3 import Lnk, patch, patch_bytes
+
+
+def test_patch(examples_path, tmp_path):
+    filename = str(tmp_path / 'temp.lnk')
+    source = os.path.join(examples_path, 'local_file.lnk')
+    shutil.copy(source, filename)
+    original = Lnk(source)
+    assert patch(filename, arguments='--flag', work_dir=None, description='text')
+    lnk = Lnk(filename)
+    assert lnk.arguments == '--flag'
+    assert lnk.work_dir is None
+    assert lnk.description == 'text'
+    assert lnk.relative_path == original.relative_path
+    assert lnk.path == original.path
+    assert not patch(filename, arguments='--flag')
+    # restore
+    assert patch(filename, arguments=None, work_dir=original.work_dir, description=None)
+    with open(source, 'rb') as f1, open(filename, 'rb') as f2:
+        assert f1.read() == f2.read()
+
+
+def test_patch_unknown_field(examples_path):
+    with open(os.path.join(examples_path, 'local_file.lnk'), 'rb') as f:
+        data = f.read()
+    with pytest.raises(TypeError):
+        patch_bytes(data, path='C:\\')
@@ -0,0 +1,79 @@
+import os
+import shutil
+
+from pylnk3 import Lnk, rewrite, rewrite_lnk
+
+
+def test_rewrite_local(examples_path):
+    lnk = Lnk(os.path.join(examples_path, 'local_file.lnk'))
+    assert not rewrite_lnk(lnk, {'C:\\Win': 'D:\\'})
+    assert rewrite_lnk(lnk, {'c:\\windows': 'D:\\Programs\\Windows'})
+    lnk = Lnk.from_buffer(lnk.to_bytes())
+    assert lnk.path == 'D:\\Programs\\Windows\\explorer.exe'
+    assert lnk.link_info.path == 'D:\\Programs\\Windows\\explorer.exe'
+    assert lnk.shell_item_id_list.get_path() == '%MY_COMPUTER%\\D:\\Programs\\Windows\\explorer.exe'
+
+
+def test_rewrite_to_network(examples_path):
+    lnk = Lnk(os.path.join(examples_path, 'mounted_folder1_file1.lnk'))
+    assert rewrite_lnk(lnk, [('Z:\\', '\\\\fileserver\\share')])
+    lnk = Lnk.from_buffer(lnk.to_bytes())
+    assert not lnk.link_flags.HasLinkTargetIDList
+    assert lnk.link_info.network_share_name == '\\\\fileserver\\share'
+    assert lnk.path == '\\\\fileserver\\share\\Downloads\\folder1\\file1.txt'
+
+
+def test_rewrite_env_block(examples_path):
+    lnk = Lnk(os.path.join(examples_path, 'send_to_fax.lnk'))
+    assert rewrite_lnk(lnk, {'%windir%\\system32': '%SystemRoot%\\System32'})
+    assert Lnk.from_buffer(lnk.to_bytes()).path == '%SystemRoot%\\System32\\WFS.exe'
+
+
+def test_rewrite_tree(examples_path, tmp_path):
+    for filename in os.listdir(examples_path):
+        shutil.copy(os.path.join(examples_path, filename), tmp_path)
+    (tmp_path / 'readme.txt').write_text('not a lnk')
+    with open(tmp_path / 'local_disk.lnk', 'rb') as f:
+        unchanged = f.read()
+    mapping = {'\\\\192.168.138.2\\storage': 'Y:\\storage'}
+
+    results = list(rewrite(str(tmp_path), mapping, workers=2, dry_run=True))
+    assert len(results) == len(os.listdir(examples_path))
+    changed = sorted(os.path.basename(result.path) for result in results if result.changed)
+    assert len(changed) == 8
+    assert Lnk(str(tmp_path / 'net_folder1_file1.lnk')).path.startswith('\\\\192.168.138.2')
+
+    results = list(rewrite(str(tmp_path), mapping, workers=2))
+    assert sorted(os.path.basename(result.path) for result in results if result.changed) == changed
+    assert Lnk(str(tmp_path / 'net_folder1_file1.lnk')).path == 'Y:\\storage\\Downloads\\folder1\\file1.txt'
+    with open(tmp_path / 'local_disk.lnk', 'rb') as f:
+        assert f.read() == unchanged
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+
+
+def test_rewrite_whole_target(examples_path):
+    filename = os.path.join(examples_path, 'local_file.lnk')
+    lnk = Lnk(filename)
+    target = lnk.shell_item_id_list.items[-1]
+    assert rewrite_lnk(lnk, {'C:\\Windows\\explorer.exe': 'E:\\x.exe'})
+    data = lnk.to_bytes()
+    item = Lnk.from_buffer(data).shell_item_id_list.items[-1]
+    assert (item.type, item.full_name) == (target.type, 'x.exe')
+    assert item.file_size == target.file_size
+    assert item.modified == target.modified
+    # the same bytes at repeated rewrites
+    lnk = Lnk(filename)
+    rewrite_lnk(lnk, {'C:\\Windows\\explorer.exe': 'E:\\x.exe'})
+    assert lnk.to_bytes() == data
+
+
+def test_rewrite_new_folders(examples_path):
+    filename = os.path.join(examples_path, 'local_file.lnk')
+    results = []
+    for _ in range(2):
+        lnk = Lnk(filename)
+        rewrite_lnk(lnk, {'C:\\': 'D:\\a\\b'})
+        results.append(lnk.to_bytes())
+    assert results[0] == results[1]
+    items = Lnk.from_buffer(results[0]).shell_item_id_list.items
+    assert [item.type for item in items[2:4]] == ['FOLDER', 'FOLDER']
@@ -0,0 +1,99 @@
+import os
+
+import pytest
+
+from pylnk3 import Lnk, SaveBatch, create_many, for_file, save_many
+
+
+def test_save_skip_if_identical(examples_path, tmp_path):
+    filename = str(tmp_path / 'temp.lnk')
+    lnk = Lnk(os.path.join(examples_path, 'local_file.lnk'))
+    assert lnk.save(filename)
+    os.utime(filename, (0, 0))
+    assert not lnk.save(filename, skip_if_identical=True)
+    assert os.stat(filename).st_mtime == 0
+    lnk.arguments = '--changed'
+    assert lnk.save(filename, skip_if_identical=True)
+    assert Lnk(filename).arguments == '--changed'
+
+
+def test_save_many(tmp_path):
+    items = [
+        (str(tmp_path / ('%d.lnk' % i)), for_file('C:\\dir\\%d.exe' % i, deterministic=True))
+        for i in range(5)
+    ]
+    assert save_many(items) == (5, 0)
+    items[0] = (items[0][0], items[0][1].to_bytes())
+    items[1][1].arguments = '--changed'
+    assert save_many(items) == (1, 4)
+    assert save_many(items, skip_if_identical=False) == (5, 0)
+
+
+def test_create_many_skip_if_identical(tmp_path):
+    records = [{'target': 'C:\\dir\\%d.exe' % i, 'name': str(tmp_path / ('%d.lnk' % i))} for i in range(5)]
+    results = list(create_many(records, workers=2, skip_if_identical=True, deterministic=True))
+    assert all(result.written for result in results)
+    results = list(create_many(records, workers=2, skip_if_identical=True, deterministic=True))
+    assert not any(result.written or result.error for result in results)
+
+
+def count_fsync(monkeypatch):
+    synced = []
+    fsync = os.fsync
+    monkeypatch.setattr(os, 'fsync', lambda fd: synced.append(fd) or fsync(fd))
+    return synced
+
+
+def test_save_atomic(examples_path, tmp_path, monkeypatch):
+    filename = str(tmp_path / 'temp.lnk')
+    synced = count_fsync(monkeypatch)
+    lnk = Lnk(os.path.join(examples_path, 'local_file.lnk'))
+    lnk.save(filename)
+    assert not synced
+    lnk.arguments = '--changed'
+
+    def replace(src, dst):
+        raise OSError('crash')
+
+    monkeypatch.setattr(os, 'replace', replace)
+    with pytest.raises(OSError):
+        lnk.save(filename, atomic=True)
+    monkeypatch.undo()
+    assert Lnk(filename).arguments is None
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+
+    synced = count_fsync(monkeypatch)
+    assert lnk.save(filename, atomic=True)
+    assert Lnk(filename).arguments == '--changed'
+    assert len(synced) == (1 if os.name == 'nt' else 2)
+
+
+def test_save_batch(tmp_path, monkeypatch):
+    synced = count_fsync(monkeypatch)
+    with SaveBatch() as batch:
+        for i in range(5):
+            batch.save(for_file('C:\\dir\\%d.exe' % i), str(tmp_path / ('%d.lnk' % i)))
+        assert not synced
+        # targets are replaced only at commit
+        assert not [name for name in os.listdir(tmp_path) if name.endswith('.lnk')]
+    # each file and the directory once
+    assert len(synced) == (5 if os.name == 'nt' else 6)
+    assert sorted(os.listdir(tmp_path)) == ['%d.lnk' % i for i in range(5)]
+
+
+@pytest.mark.skipif(os.name == 'nt', reason='posix modes')
+def test_save_atomic_mode(tmp_path, monkeypatch):
+    lnk = for_file('C:\\dir\\file.exe')
+    # process wide umask must not be changed, even for a moment
+    monkeypatch.setattr(os, 'umask', None)
+    lnk.save(str(tmp_path / 'plain.lnk'))
+    mode = os.stat(tmp_path / 'plain.lnk').st_mode & 0o777
+    lnk.save(str(tmp_path / 'atomic.lnk'), atomic=True)
+    with SaveBatch() as batch:
+        batch.save(lnk, str(tmp_path / 'batch.lnk'))
+    assert os.stat(tmp_path / 'atomic.lnk').st_mode & 0o777 == mode
+    assert os.stat(tmp_path / 'batch.lnk').st_mode & 0o777 == mode
+    # mode of existed file is kept
+    os.chmod(tmp_path / 'atomic.lnk', 0o600)
+    lnk.save(str(tmp_path / 'atomic.lnk'), atomic=True)
+    assert os.stat(tmp_path / 'atomic.lnk').st_mode & 0o777 == 0o600
@@ -0,0 +1,45 @@
+from pylnk3 import Lnk, PathSegmentEntry, SegmentCache, for_file
+
+
+def count_stats(monkeypatch):
+    calls = []
+    create_for_path = PathSegmentEntry.create_for_path
+
+    def counted(path, *args):
+        calls.append(path)
+        return create_for_path(path, *args)
+
+    monkeypatch.setattr(PathSegmentEntry, 'create_for_path', counted)
+    return calls
+
+
+def test_segment_cache(monkeypatch):
+    calls = count_stats(monkeypatch)
+    cache = SegmentCache()
+    for i in range(10):
+        lnk = for_file('C:\\Program Files\\Vendor\\App\\file%d.exe' % i, segment_cache=cache)
+    assert lnk.path == 'C:\\Program Files\\Vendor\\App\\file9.exe'
+    assert Lnk.from_buffer(lnk.to_bytes()).path == lnk.path
+    # 3 folders once, target file every time
+    assert len(calls) == 3 + 10
+    assert cache.hits == 3 * 9
+    assert len(cache) == 3
+    # keys are normalized
+    cache.get('c:\\program files\\vendor\\')
+    assert len(cache) == 3
+
+
+def test_segment_cache_limits(monkeypatch):
+    calls = count_stats(monkeypatch)
+    cache = SegmentCache(maxsize=2)
+    for_file('C:\\a\\b\\c\\file.txt', segment_cache=cache)
+    assert len(cache) == 2
+    cache.invalidate('C:\\A')
+    assert len(cache) == 0
+    cache = SegmentCache(ttl=0)
+    for_file('C:\\a\\file1.txt', segment_cache=cache)
+    for_file('C:\\a\\file2.txt', segment_cache=cache)
+    assert cache.hits == 0
+    cache.invalidate()
+    assert len(cache) == 0
+    assert len(calls) == 4 + 4
@@ -0,0 +1,43 @@
+import os
+
+import pytest
+
+from pylnk3 import Lnk, LnkTemplate, for_file
+
+
+def test_template_prototype(examples_path):
+    filename = os.path.join(examples_path, 'local_file.lnk')
+    template = LnkTemplate(Lnk(filename))
+    with open(filename, 'rb') as f:
+        assert template.render() == f.read()
+
+
+@pytest.mark.parametrize('filename', ('local_file.lnk', 'mounted_folder1_file1.lnk', 'net_folder1_file1.lnk'))
+def test_template_target(examples_path, filename):
+    prototype = Lnk(os.path.join(examples_path, filename))
+    template = LnkTemplate(prototype)
+    lnk = Lnk.from_buffer(template.render(target='other file.txt', arguments='--flag'))
+    folder = prototype.path.rsplit('\\', 1)[0]
+    assert lnk.path == folder + '\\other file.txt'
+    assert lnk.link_info.path == prototype.link_info.path.rsplit('\\', 1)[0] + '\\other file.txt'
+    assert lnk.arguments == '--flag'
+    assert lnk.creation_time == prototype.creation_time
+
+
+def test_template_slots(tmp_path):
+    filename = str(tmp_path / 'temp.lnk')
+    template = LnkTemplate(for_file('C:\\Program Files\\App\\app.exe', description='App'))
+    template.save(filename, target='C:\\Program Files\\App\\tool.exe', description=None, icon='C:\\app.ico')
+    lnk = Lnk(filename)
+    assert lnk.path == 'C:\\Program Files\\App\\tool.exe'
+    assert lnk.description is None
+    assert lnk.icon == 'C:\\app.ico'
+    with pytest.raises(ValueError):
+        template.render(target='C:\\Other\\tool.exe')
+    with pytest.raises(TypeError):
+        template.render(work_dir='C:\\')
+
+
+def test_template_unsupported(examples_path):
+    with pytest.raises(ValueError):
+        LnkTemplate(Lnk(os.path.join(examples_path, 'uwp_calc.lnk')))